@@ -0,0 +1,80 @@
+#!/usr/bin/python3
+
+import argparse
+import sqlite3
+from os.path import abspath, dirname, join
+from sys import exit, path
+from tempfile import TemporaryDirectory
+from time import time
+
+path.insert(0, dirname(dirname(abspath(__file__))))
+
+from rdflib.term import URIRef
+
+from benchmarks.synthetic import SQLiteServer, generate, write_mapping
+from geo.area import Area
+from interfaces.schemas.databases import SchemaDB
+from translators.abox.disk import translate, PRIMARY_TABLE
+from translators.abox.incremental import delta
+from translators.references.reference_manager import ReferenceManager
+
+
+def run(scale, root):
+    """ Change one root record of a synthetic DISK database, translate
+        only that record again, and check that the previous graph with
+        the delta applied equals a full translation of the changed
+        database; returns the sizes of the delta
+    """
+    with TemporaryDirectory() as directory:
+        filename = join(directory, "disk.sqlite")
+        mapping_filename = join(directory, "disk.json")
+        generate(filename, "disk", scale)
+        write_mapping(filename, "disk", mapping_filename)
+        mapper = SchemaDB(mapping_filename)
+        timestamp = int(time())
+
+        visited = ReferenceManager()
+        previous = translate(SQLiteServer(filename, "disk"), mapper, Area(), timestamp, visited=visited)
+
+        db = sqlite3.connect(filename)
+        with db:
+            db.execute("UPDATE {} SET naam = 'changed' WHERE id = ?".format(PRIMARY_TABLE), (root,))
+        db.close()
+
+        # as mkgraph does for an incremental run
+        changed = ReferenceManager()
+        changed.add_references(PRIMARY_TABLE, {root})
+        visited.difference_update(changed)
+        references = ReferenceManager()
+        references.add_references(PRIMARY_TABLE, {root})
+
+        current = translate(SQLiteServer(filename, "disk"), mapper, Area(), timestamp,
+                            references=references, visited=visited)
+        expected = translate(SQLiteServer(filename, "disk"), mapper, Area(), timestamp)
+
+    base = URIRef(dict(current.namespaces())["rws.disk"])
+    additions, removals = delta(previous, current, changed, mapper, base)
+
+    previous += additions
+    previous -= removals
+    without_base = lambda g: {triple for triple in g if triple[0] != base}
+    if without_base(previous) != without_base(expected):
+        missing = len(without_base(expected) - without_base(previous))
+        extra = len(without_base(previous) - without_base(expected))
+        raise AssertionError("Delta misses {} and keeps {} triples".format(missing, extra))
+
+    return (len(additions), len(removals))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scale", help="Number of root records", type=int, default=200)
+    parser.add_argument("--root", help="ID of the root record to change", type=int, default=1)
+    args = parser.parse_args()
+
+    try:
+        nadditions, nremovals = run(args.scale, args.root)
+    except AssertionError as e:
+        print(e)
+        exit(1)
+
+    print("Delta of {} additions and {} removals applies cleanly".format(nadditions, nremovals))
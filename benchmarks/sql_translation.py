@@ -0,0 +1,85 @@
+#!/usr/bin/python3
+
+import argparse
+import json
+from multiprocessing import get_context
+from os.path import abspath, dirname, join
+from sys import path
+from tempfile import TemporaryDirectory
+from time import perf_counter, time
+
+path.insert(0, dirname(dirname(abspath(__file__))))
+
+from benchmarks.synthetic import SQLiteServer, generate, write_mapping
+from geo.area import Area
+from interfaces.schemas.databases import SchemaDB
+from rdf.sinks import CountingSink
+from translators.abox import metrics
+from translators.abox.columnar import set_columnar_options
+from translators.abox.disk import translate as translate_disk
+from translators.abox.ultimo import translate as translate_ultimo
+
+
+TRANSLATORS = {'disk': translate_disk, 'ultimo': translate_ultimo}
+
+def run(database, scale, workers=1, stream=False, columnar=False):
+    """ Translate a synthetic database of scale root records end to end
+        and measure throughput and memory
+    """
+    with TemporaryDirectory() as directory:
+        filename = join(directory, "{}.sqlite".format(database))
+        mapping_filename = join(directory, "{}.json".format(database))
+        sizes = generate(filename, database, scale)
+        write_mapping(filename, database, mapping_filename)
+
+        mapper = SchemaDB(mapping_filename)
+        server = SQLiteServer(filename, database)
+        sink = CountingSink() if stream else None
+        set_columnar_options(columnar)
+
+        metrics.current().clear()
+        t0 = perf_counter()
+        g = TRANSLATORS[database](server, mapper, Area(), int(time()), workers, sink)
+        elapsed = perf_counter() - t0
+
+        server.disconnect()
+
+    report = metrics.current().report()
+    rows = sum(table['rows_fetched'] for table in report['tables'])
+
+    return {'database': database,
+            'scale': scale,
+            'database_rows': sum(sizes.values()),
+            'workers': workers,
+            'stream': stream,
+            'columnar': columnar,
+            'rows': rows,
+            'triples': len(g),
+            'seconds': elapsed,
+            'rows_per_second': rows / elapsed,
+            'triples_per_second': len(g) / elapsed,
+            'peak_rss': metrics.peak_rss()}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--database", help="Kind of synthetic database", choices=sorted(TRANSLATORS.keys()),
+                        default='disk')
+    parser.add_argument("--scales", help="Numbers of root records", type=int, nargs='+', default=[1000, 5000, 20000])
+    parser.add_argument("--workers", help="Number of tables to translate in parallel", type=int, default=1)
+    parser.add_argument("--stream", help="Count triples instead of keeping them in a graph", action="store_true")
+    parser.add_argument("--columnar", help="Translate in column batches (with --stream)", action="store_true")
+    parser.add_argument("-o", "--output", help="Results file (JSON)", default="sql_translation.json")
+    args = parser.parse_args()
+
+    # measure every scale in a fresh process, to not share peak memory
+    results = []
+    with get_context("spawn").Pool(processes=1, maxtasksperchild=1) as pool:
+        for scale in args.scales:
+            result = pool.apply(run, (args.database, scale, args.workers, args.stream, args.columnar))
+            print("{database} x {scale}: {rows} rows, {triples} triples in {seconds:.1f}s "
+                  "({rows_per_second:.0f} rows/s, {triples_per_second:.0f} triples/s, "
+                  "{peak_mb:.0f} MB)".format(peak_mb=result['peak_rss'] / 2**20, **result))
+            results.append(result)
+
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
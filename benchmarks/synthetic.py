@@ -0,0 +1,363 @@
+#!/usr/bin/python3
+
+import json
+import sqlite3
+from contextlib import contextmanager
+from copy import copy
+from itertools import islice
+from os.path import abspath, dirname
+from random import Random
+from sys import path
+
+path.insert(0, dirname(dirname(abspath(__file__))))
+
+from rdflib.namespace import XSD
+
+from geo.area import Area
+from schema.auxiliarly import attributename_from_table,\
+                              classname_from_table,\
+                              relationname_from_table
+
+
+MAX_PARAMETERS = 900  # SQLite allows up to 999 parameters per statement
+BATCH_SIZE = 10000
+NFILLER_TABLES = 60
+NFILLER_ROWS = 10
+
+XSD_TYPES = {'int': XSD.integer,
+             'float': XSD.decimal,
+             'varchar': XSD.string,
+             'date': XSD.date}
+
+# table: (columns, foreign keys, rows), where rows is either a fixed
+# number, 'scale' for the root table, or a fan-out per parent record
+DISK_TABLES = {
+    "tbl_beheerobjecttype": ([("id", "int"), ("naam", "varchar")], {}, 20),
+    "tbl_beheerder": ([("id", "int"), ("naam", "varchar"), ("afdeling", "varchar")], {}, 30),
+    "tbl_gevaarlijkestof": ([("id", "int"), ("naam", "varchar")], {}, 50),
+    "tbl_inspectievoorziening": ([("id", "int"), ("naam", "varchar")], {}, 15),
+    "tbl_toestand": ([("id", "int"), ("naam", "varchar")], {}, 6),
+    "tbl_objectdeeltype": ([("id", "int"), ("naam", "varchar")], {}, 40),
+    "tbl_maatregeltype": ([("id", "int"), ("naam", "varchar")], {}, 25),
+    "tbl_document": ([("id", "int"), ("titel", "varchar"), ("datum", "date")], {}, 'scale'),
+    "tbl_beheerobject": ([("id", "int"), ("naam", "varchar"), ("code", "varchar"), ("omschrijving", "varchar"),
+                          ("rdx", "float"), ("rdy", "float"), ("bouwjaar", "int"),
+                          ("beheerobjecttypeid", "int"), ("beheerderid", "int")],
+                         {"beheerobjecttypeid": "tbl_beheerobjecttype", "beheerderid": "tbl_beheerder"},
+                         'scale'),
+    "ktbl_beheerobject_gevaarlijkestof": ([("id", "int"), ("beheerobjectid", "int"), ("gevaarlijkestofid", "int")],
+                                          {"beheerobjectid": "tbl_beheerobject",
+                                           "gevaarlijkestofid": "tbl_gevaarlijkestof"}, 0.5),
+    "ktbl_beheerobject_inspectievoorziening": ([("id", "int"), ("beheerobjectid", "int"),
+                                                ("inspectievoorzieningid", "int")],
+                                               {"beheerobjectid": "tbl_beheerobject",
+                                                "inspectievoorzieningid": "tbl_inspectievoorziening"}, 1),
+    "ktbl_beheerobject_toestand": ([("id", "int"), ("beheerobjectid", "int"), ("toestandid", "int"),
+                                    ("datum", "date")],
+                                   {"beheerobjectid": "tbl_beheerobject", "toestandid": "tbl_toestand"}, 1),
+    "ktbl_document_beheerobject": ([("id", "int"), ("beheerobjectid", "int"), ("documentid", "int")],
+                                   {"beheerobjectid": "tbl_beheerobject", "documentid": "tbl_document"}, 2),
+    "tbl_ciww": ([("id", "int"), ("beheerobjectid", "int"), ("omschrijving", "varchar")],
+                 {"beheerobjectid": "tbl_beheerobject"}, 0.3),
+    "tbl_gis_miok": ([("id", "int"), ("beheerobjectid", "int"), ("rdx", "float"), ("rdy", "float")],
+                     {"beheerobjectid": "tbl_beheerobject"}, 1),
+    "tbl_inspectie": ([("id", "int"), ("beheerobjectid", "int"), ("datum", "date"), ("inspecteur", "varchar"),
+                       ("opmerking", "varchar")],
+                      {"beheerobjectid": "tbl_beheerobject"}, 3),
+    "tbl_maatregelhistorie": ([("id", "int"), ("beheerobjectid", "int"), ("maatregeltypeid", "int"),
+                               ("datum", "date"), ("kosten", "float")],
+                              {"beheerobjectid": "tbl_beheerobject", "maatregeltypeid": "tbl_maatregeltype"}, 2),
+    "tbl_objectdeel": ([("id", "int"), ("beheerobjectid", "int"), ("objectdeeltypeid", "int"), ("naam", "varchar"),
+                        ("hoeveelheid", "float")],
+                       {"beheerobjectid": "tbl_beheerobject", "objectdeeltypeid": "tbl_objectdeeltype"}, 5)}
+
+ULTIMO_TABLES = {
+    "Site": ([("SiteId", "int"), ("SiteDescr", "varchar")], {}, 25),
+    "JobStatus": ([("JstId", "int"), ("JstDescr", "varchar")], {}, 8),
+    "ProcessFunction": ([("prfid", "int"), ("PrfCode", "varchar"), ("PrfDescr", "varchar"),
+                         ("PrfContext", "varchar"), ("_PrfRDGeocodeX", "varchar"), ("_PrfRDGeocodeY", "varchar"),
+                         ("PrfSiteId", "int")],
+                        {"PrfSiteId": "Site"}, 'scale'),
+    "Job": ([("JobId", "int"), ("JobPrfId", "int"), ("JobDescr", "varchar"), ("JobJstId", "int"),
+             ("JobDate", "date")],
+            {"JobPrfId": "ProcessFunction", "JobJstId": "JobStatus"}, 4),
+    "Equipment": ([("EqmId", "int"), ("EqmPrfId", "int"), ("EqmDescr", "varchar")],
+                  {"EqmPrfId": "ProcessFunction"}, 2),
+    "ProcessFunctionHistory": ([("PfhId", "int"), ("PfhPrfId", "int"), ("PfhDate", "date"),
+                                ("PfhRemark", "varchar")],
+                               {"PfhPrfId": "ProcessFunction"}, 2)}
+
+DATABASES = {'disk': DISK_TABLES, 'ultimo': ULTIMO_TABLES}
+
+def generate(filename, database, scale, seed=0):
+    """ Write a synthetic database with scale root records to an SQLite
+        file, together with unrelated filler tables
+    """
+    rnd = Random(seed)
+    tables = dict(DATABASES[database])
+    for i in range(NFILLER_TABLES):
+        tables["tbl_filler_{:02d}".format(i) if database == 'disk' else "Filler{:02d}".format(i)] =\
+                ([("id", "int"), ("naam", "varchar")], {}, NFILLER_ROWS)
+
+    db = sqlite3.connect(filename)
+    sizes = {}
+    for table, (columns, foreign_keys, rows) in _in_dependency_order(tables):
+        definitions = []
+        for i, (column, datatype) in enumerate(columns):
+            definition = "[{}] {}".format(column, datatype)
+            if i == 0:
+                definition += " PRIMARY KEY"
+            if column in foreign_keys.keys():
+                definition += " REFERENCES [{}]".format(foreign_keys[column])
+            definitions.append(definition)
+        db.execute("CREATE TABLE [{}] ({})".format(table, ", ".join(definitions)))
+
+        # child tables have fan-out many records per parent record
+        parent = _parent_of(foreign_keys, tables)
+        if rows == 'scale':
+            nrows = scale
+        elif parent is not None:
+            nrows = sum(rnd.randint(0, int(2 * rows)) if rows >= 1 else int(rnd.random() < rows)
+                        for _ in range(sizes[parent]))
+        else:
+            nrows = rows
+        sizes[table] = nrows
+
+        records = (_record(database, i + 1, columns, foreign_keys, parent, sizes, rnd) for i in range(nrows))
+        db.executemany("INSERT INTO [{}] VALUES ({})".format(table, ", ".join(["?"] * len(columns))), records)
+
+    db.commit()
+    db.close()
+
+    return sizes
+
+def mapping(filename, database):
+    """ Return a database mapping of the synthetic database, as made by
+        mkschema
+    """
+    server = SQLiteServer(filename, database)
+    schema = {'metadata': {'database': database}, 'schema': {}}
+    for table in server.catalog_tables():
+        columns = server.list_table_info(table)
+        foreign_keys = {key['column_name']: key['referenced_table'] for key in server.foreign_keys(table)}
+
+        schema['schema'][table] = {'link_table': table.lower().startswith('ktbl'),
+                                   'classname': classname_from_table(database, table),
+                                   'subClassOf': None,
+                                   'include': True,
+                                   'identifier': columns[0]['column_name'],
+                                   'attributes': {column['column_name']:
+                                                  {'property': attributename_from_table(column['column_name']),
+                                                   'subPropertyOf': None,
+                                                   'datatype': XSD_TYPES[column['data_type']],
+                                                   'include': True}
+                                                  for column in columns
+                                                  if column['column_name'] not in foreign_keys.keys()},
+                                   'relations': {column: {'property': relationname_from_table(column),
+                                                          'subPropertyOf': None,
+                                                          'targettable': referenced_table,
+                                                          'targetclassname': classname_from_table(database,
+                                                                                                  referenced_table),
+                                                          'include': True}
+                                                 for column, referenced_table in foreign_keys.items()}}
+    server.disconnect()
+
+    return schema
+
+def write_mapping(filename, database, mapping_filename):
+    with open(mapping_filename, 'w') as f:
+        json.dump(mapping(filename, database), f)
+
+class SQLiteServer:
+    """ SQLite stand-in for SQLServer
+
+    Serves a synthetic database through the same interface. The where
+    clauses and selections of the translators are passed on as is, as
+    SQLite understands the SQL Server dialect they use.
+    """
+
+    def __init__(self, filename, database):
+        self.filename = filename
+        self.server = self.Config(database)
+        self.connect()
+
+    def query(self, query, params=None, as_dict=True):
+        cursor = self._connection.execute(query, params if params is not None else ())
+        if not as_dict:
+            return cursor
+
+        columns = [description[0] for description in cursor.description]
+        return (dict(zip(columns, row)) for row in cursor)
+
+    def page(self, query, params=None, as_dict=True):
+        return list(self.query(query, params, as_dict))
+
+    def stream(self, query, params=None, as_dict=True, batch_size=BATCH_SIZE):
+        return self.query(query, params, as_dict)
+
+    def connect(self, pool_size=1):
+        self._connection = sqlite3.connect(self.filename, check_same_thread=False)
+
+    def disconnect(self):
+        self._connection.close()
+
+    @contextmanager
+    def session(self, timeout=None):
+        session = copy(self)
+        session.connect()
+        try:
+            yield session
+        finally:
+            session.disconnect()
+
+    ## Predefined Queries ##
+
+    def catalog_tables(self):
+        q = "SELECT name FROM sqlite_master WHERE type = 'table' ORDER BY name"
+        return [r['name'] for r in self.page(q)]
+
+    def list_table_info(self, table):
+        return [{'column_name': r['name'], 'data_type': r['type'].lower()}
+                for r in self.page("SELECT * FROM pragma_table_info(?) ORDER BY cid", (table,))]
+
+    def list_tables(self, database=None):
+        return [{'TABLE_NAME': table, 'TABLE_TYPE': 'BASE TABLE'} for table in self.catalog_tables()]
+
+    def list_columns(self, table, include_keys=True):
+        columns = self.list_table_info(table)
+        if not include_keys:
+            skeys = [key['column_name'] for key in self.foreign_keys(table)]
+            columns = [column for column in columns if column['column_name'] not in skeys]
+
+        return columns
+
+    def primary_key(self, table):
+        keys = [r['name'] for r in self.page("SELECT * FROM pragma_table_info(?) WHERE pk > 0", (table,))]
+        return {'COLUMN_NAME': keys[0]} if len(keys) == 1 else None
+
+    def foreign_keys(self, table):
+        return [{'column_name': r['from'],
+                 'referenced_table': r['table'],
+                 'referenced_column': r['to'] if r['to'] is not None else self.primary_key(r['table'])['COLUMN_NAME']}
+                for r in self.page("SELECT * FROM pragma_foreign_key_list(?)", (table,))]
+
+    def inverse_foreign_keys(self, table):
+        return [{'key_name': "fk_{}_{}".format(key['table_name'], key['column_name']),
+                 'foreign_table': key['table_name'],
+                 'foreign_column': key['column_name'],
+                 'parent_table': key['referenced_table'],
+                 'parent_column': key['referenced_column']}
+                for key in self.all_foreign_keys() if key['referenced_table'] == table]
+
+    ## Catalog Queries ##
+
+    def all_columns(self):
+        return [dict(column, table_name=table) for table in self.catalog_tables()
+                for column in self.list_table_info(table)]
+
+    def all_primary_keys(self):
+        return [{'table_name': table, 'column_name': self.primary_key(table)['COLUMN_NAME']}
+                for table in self.catalog_tables() if self.primary_key(table) is not None]
+
+    def all_foreign_keys(self):
+        return [dict(key, table_name=table, key_name="fk_{}_{}".format(table, key['column_name']))
+                for table in self.catalog_tables() for key in self.foreign_keys(table)]
+
+    def key_ranges(self, table, key, n, where=None):
+        q = """SELECT MIN([{0}]) AS low, MAX([{0}]) AS high
+               FROM (SELECT [{0}], NTILE({1}) OVER (ORDER BY [{0}]) AS tile
+                     FROM [{2}]{3})
+               GROUP BY tile
+               ORDER BY tile""".format(key, int(n), table, " WHERE {}".format(where) if where is not None else "")
+
+        return [(r['low'], r['high']) for r in self.page(q)]
+
+    def row_counts(self):
+        return {table: self.count(table) for table in self.catalog_tables()}
+
+    def count(self, table, where=None):
+        q = "SELECT COUNT(*) AS n FROM [{}]".format(table)
+        if where is not None:
+            q += " WHERE {}".format(where)
+
+        return self.page(q)[0]['n']
+
+    def sample(self, table, n, select='*'):
+        return self.page("SELECT {} FROM [{}] LIMIT {}".format(select, table, int(n)))
+
+    ## Generators ##
+
+    def records(self, table, select='*', where=None, key=None, batch_size=BATCH_SIZE):
+        q = "SELECT {} FROM [{}]".format(select, table)
+        if where is not None:
+            q += " WHERE ({})".format(where)
+        if key is not None:
+            q += " ORDER BY [{}]".format(key)
+
+        return self.stream(q)
+
+    def records_in(self, table, column, values, select='*', where=None, batch_size=MAX_PARAMETERS):
+        values = iter(values)
+        batch = list(islice(values, batch_size))
+        while len(batch) > 0:
+            q = "SELECT {} FROM [{}] WHERE [{}] IN ({})".format(select, table, column, ", ".join(["?"] * len(batch)))
+            if where is not None:
+                q += " AND ({})".format(where)
+
+            for rec in self.page(q, tuple(batch)):
+                yield rec
+
+            batch = list(islice(values, batch_size))
+
+    class Config:
+        def __init__(self, database):
+            self.database = database
+
+        def absolute(self, table):
+            return "[{}]".format(table)
+
+def _in_dependency_order(tables):
+    done = set()
+    while len(done) < len(tables):
+        for table, (columns, foreign_keys, rows) in sorted(tables.items()):
+            if table in done or not set(foreign_keys.values()) <= done | {table}:
+                continue
+
+            done.add(table)
+            yield (table, (columns, foreign_keys, rows))
+
+def _parent_of(foreign_keys, tables):
+    for referenced_table in foreign_keys.values():
+        if tables[referenced_table][2] == 'scale':
+            return referenced_table
+
+    return None
+
+def _record(database, i, columns, foreign_keys, parent, sizes, rnd):
+    record = [i]
+    for column, datatype in columns[1:]:
+        if column in foreign_keys.keys():
+            referenced_table = foreign_keys[column]
+            if referenced_table == parent:
+                # spread children evenly over their parents
+                record.append(rnd.randint(1, sizes[parent]))
+            else:
+                record.append(rnd.randint(1, sizes[referenced_table]))
+        elif column in ("rdx", "_PrfRDGeocodeX"):
+            x = rnd.uniform(Area.RD_X_MIN, Area.RD_X_MAX)
+            record.append(x / 1000 if database == 'disk' else "{:.2f}".format(x).replace('.', ','))
+        elif column in ("rdy", "_PrfRDGeocodeY"):
+            y = rnd.uniform(Area.RD_Y_MIN, Area.RD_Y_MAX)
+            record.append(y / 1000 if database == 'disk' else "{:.2f}".format(y).replace('.', ','))
+        elif column == "PrfContext":
+            record.append('32768' if rnd.random() < 0.9 else '0')
+        elif datatype == 'int':
+            record.append(rnd.randint(1900, 2020))
+        elif datatype == 'float':
+            record.append(round(rnd.uniform(0, 1000), 2))
+        elif datatype == 'date':
+            record.append("{}-{:02d}-{:02d}".format(rnd.randint(1990, 2020), rnd.randint(1, 12), rnd.randint(1, 28)))
+        else:
+            record.append("{} {} {}".format(column, i, rnd.choice(["noord", "oost", "zuid", "west"])))
+
+    return tuple(record)
@@ -0,0 +1,121 @@
+#!/usr/bin/python3
+
+import argparse
+from os.path import abspath, dirname
+from sys import path
+from time import perf_counter
+
+path.insert(0, dirname(dirname(abspath(__file__))))
+
+from rdflib.graph import Graph
+from rdflib.term import URIRef, Literal
+
+from rdf.operators import gen_hash, add_property, add_label, add_type
+from translators.abox import generic_sql
+from translators.references.reference_manager import ReferenceManager
+
+
+TABLE = "tbl_synthetic"
+XSD = "http://www.w3.org/2001/XMLSchema#"
+
+class SyntheticMapper:
+    def __init__(self, nattributes, nrelations):
+        attributes = {"attr_{}".format(i): {'property': "attr_{}".format(i),
+                                            'datatype': XSD + "string",
+                                            'include': True}
+                      for i in range(nattributes)}
+        relations = {"rel_{}id".format(i): {'property': "rel_{}".format(i),
+                                            'targettable': "tbl_target_{}".format(i),
+                                            'targetclassname': "Target{}".format(i),
+                                            'include': True}
+                     for i in range(nrelations)}
+
+        self.schema = {'schema': {TABLE: {'classname': "Synthetic",
+                                          'identifier': "id",
+                                          'attributes': attributes,
+                                          'relations': relations}}}
+
+    def attributes(self, table):
+        return iter(self.schema['schema'][table]['attributes'])
+
+    def relations(self, table):
+        return iter(self.schema['schema'][table]['relations'])
+
+class SyntheticServer:
+    def __init__(self, nrows, nattributes, nrelations):
+        self._records = []
+        for i in range(nrows):
+            rec = {'id': i}
+            rec.update({"attr_{}".format(j): " value {} ".format(i) for j in range(nattributes)})
+            rec.update({"rel_{}id".format(j): i % 97 for j in range(nrelations)})
+            self._records.append(rec)
+
+    def records_in(self, table, column, values):
+        return iter(self._records)
+
+def legacy_table_to_graph(g, server, references, table, referenced_records, mapper):
+    """ Row-wise translation as done before translation plans """
+    ns = dict(g.namespace_manager.namespaces())
+    mapping = mapper.schema['schema'][table]
+    class_node = URIRef(ns[generic_sql.DEFAULT_SCHEMA_PREFIX] + mapping['classname'])
+
+    referenced_nodes = set(referenced_records)
+    attributes = list(mapper.attributes(table))
+    relations = list(mapper.relations(table))
+
+    for rec in server.records_in(table, mapping['identifier'], referenced_nodes):
+        if rec[mapping['identifier']] not in referenced_nodes:
+            continue
+
+        rec_node = URIRef(ns[generic_sql.DEFAULT_PREFIX] + gen_hash(mapping['classname'], rec[mapping['identifier']]))
+        add_type(g, rec_node, class_node)
+        add_label(g, rec_node, "{} {}".format(mapping['classname'], rec[mapping['identifier']]))
+
+        for k,v in rec.items():
+            if v is None:
+                continue
+            if k in attributes:
+                attr = mapping['attributes'][k]
+                if type(v) is str:
+                    v = v.strip()
+                attr_node = Literal(v, datatype=URIRef(attr['datatype']))
+                attr_link = URIRef(ns[generic_sql.DEFAULT_SCHEMA_PREFIX] + "{}_{}".format(mapping['classname'].lower(), attr['property']))
+                add_property(g, rec_node, attr_node, attr_link)
+            if k in relations:
+                rel = mapping['relations'][k]
+                referenced_node = URIRef(ns[generic_sql.DEFAULT_PREFIX] + gen_hash(rel['targetclassname'], v))
+                rel_link = URIRef(ns[generic_sql.DEFAULT_SCHEMA_PREFIX] + "{}_{}".format(mapping['classname'].lower(), rel['property']))
+                add_property(g, rec_node, referenced_node, rel_link)
+                inverse_rel_link = URIRef(ns[generic_sql.DEFAULT_SCHEMA_PREFIX] + "{}_inv_{}".format(rel['targetclassname'].lower(),
+                                                                                                     mapping['classname'].lower()))
+                add_property(g, referenced_node, rec_node, inverse_rel_link)
+                references.add_reference(rel['targettable'], v)
+
+def run(translator, server, mapper, nrows):
+    g = Graph()
+    generic_sql._update_namespaces(g.namespace_manager)
+
+    t0 = perf_counter()
+    translator(g, server, ReferenceManager(), TABLE, range(nrows), mapper)
+    elapsed = perf_counter() - t0
+
+    return (g, elapsed)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", help="Number of synthetic rows", type=int, default=20000)
+    parser.add_argument("--attributes", help="Number of attribute columns", type=int, default=10)
+    parser.add_argument("--relations", help="Number of relation columns", type=int, default=3)
+    args = parser.parse_args()
+
+    mapper = SyntheticMapper(args.attributes, args.relations)
+    server = SyntheticServer(args.rows, args.attributes, args.relations)
+
+    g_before, t_before = run(legacy_table_to_graph, server, mapper, args.rows)
+    g_after, t_after = run(generic_sql._table_to_graph, server, mapper, args.rows)
+
+    if set(g_before) != set(g_after):
+        raise Exception("Translation plan output differs from row-wise output")
+
+    print("before: {:.0f} rows/s".format(args.rows / t_before))
+    print("after:  {:.0f} rows/s".format(args.rows / t_after))
@@ -0,0 +1,54 @@
+#!/usr/bin/python3
+
+import argparse
+from os.path import abspath, dirname
+from sys import path
+from time import perf_counter
+
+path.insert(0, dirname(dirname(abspath(__file__))))
+
+from rdflib.graph import Graph
+
+from benchmarks.translation_plan import TABLE, SyntheticMapper, SyntheticServer
+from rdf.sinks import TripleBuffer
+from translators.abox import generic_sql
+from translators.references.reference_manager import ReferenceManager
+
+
+def run(partial_factory, server, mapper, nrows):
+    """ Translate into a partial result and merge it into a graph, as
+        done per table by parallel workers and per checkpointed iteration
+    """
+    g = Graph()
+    generic_sql._update_namespaces(g.namespace_manager)
+
+    t0 = perf_counter()
+    partial = partial_factory()
+    generic_sql._update_namespaces(partial.namespace_manager)
+    generic_sql._table_to_graph(partial, server, ReferenceManager(), TABLE, range(nrows), mapper)
+    if isinstance(partial, TripleBuffer):
+        partial.flush(g)
+    else:
+        g += partial
+    elapsed = perf_counter() - t0
+
+    return (g, elapsed)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", help="Number of synthetic rows", type=int, default=20000)
+    parser.add_argument("--attributes", help="Number of attribute columns", type=int, default=10)
+    parser.add_argument("--relations", help="Number of relation columns", type=int, default=3)
+    args = parser.parse_args()
+
+    mapper = SyntheticMapper(args.attributes, args.relations)
+    server = SyntheticServer(args.rows, args.attributes, args.relations)
+
+    g_before, t_before = run(Graph, server, mapper, args.rows)
+    g_after, t_after = run(TripleBuffer, server, mapper, args.rows)
+
+    if set(g_before) != set(g_after):
+        raise Exception("Buffered output differs from graph output")
+
+    print("graph:  {:.0f} rows/s".format(args.rows / t_before))
+    print("buffer: {:.0f} rows/s".format(args.rows / t_after))
@@ -2,29 +2,60 @@
 
 import logging
 
-from rdflib import Graph
 from rdflib.util import guess_format
 
+from rdf.stores import open_graph, is_persistent, source_stamps, stored_sources, save_sources
+
 
 logger = logging.getLogger(__name__)
 
-def read(path=None, identifier=None, format=None):
+def read(path=None, identifier=None, format=None, store='default', store_path=None):
     """ Imports a RDF graph from local file.
+
+    With a persistent store, a store previously filled from the same,
+    unchanged, file is reopened as is instead of parsing the file again.
     """
-    graph = Graph(identifier=identifier) if identifier is not None\
-            else Graph()
+    if path is None:
+        raise ValueError("Path cannot be left undefined")
+
+    graph, reused = _open_store([path], identifier, store, store_path)
+    if reused:
+        return graph
 
-    return _read(graph, path, format)
+    _read(graph, path, format)
+    if is_persistent(store):
+        save_sources(store_path, source_stamps([path]))
 
-def multiread(paths=[], identifier=None, format=None):
-    graph = Graph(identifier=identifier) if identifier is not None\
-            else Graph()
+    return graph
+
+def multiread(paths=[], identifier=None, format=None, store='default', store_path=None):
+    graph, reused = _open_store(paths, identifier, store, store_path)
+    if reused:
+        return graph
 
     for path in paths:
         _read(graph, path=path)
+    if is_persistent(store):
+        save_sources(store_path, source_stamps(paths))
 
     return graph
 
+def _open_store(paths, identifier, store, store_path):
+    """ Open a graph on store; a persistent store is only reused if it was
+        filled from the same sources, unchanged since, and is recreated
+        otherwise
+    """
+    if not is_persistent(store):
+        return (open_graph(identifier, store), False)
+
+    reuse = stored_sources(store_path) == source_stamps(paths)
+    graph = open_graph(identifier, store, store_path, fresh=not reuse)
+    if reuse and len(graph) > 0:
+        logger.info("Reusing stored RDF Graph ({} facts)".format(len(graph)))
+        return (graph, True)
+
+    return (graph, False)
+
 def _read(graph, path=None, format=None):
     """ Imports a RDF graph from local file.
     """
@@ -1,9 +1,14 @@
 #!/usr/bin/python3
 
-from os.path import splitext
+from heapq import merge
+from itertools import islice
+from os.path import abspath, dirname, join, splitext
 from logging import getLogger
+from tempfile import TemporaryDirectory
 
 
+RUN_SIZE = 1000000  # lines sorted in memory at once
+
 logger = getLogger(__name__)
 
 def write(graph, filename, sformat='turtle'):
@@ -15,6 +20,48 @@ def write(graph, filename, sformat='turtle'):
     logger.info("Writing RDF graph ({}, {} triples) to {}".format(sformat, len(graph), filename))
     graph.serialize(destination=filename, format=sformat)
 
+def merge_lines(filenames, filename, run_size=RUN_SIZE):
+    """ Merge N-Triples or N-Quads files into one without duplicate lines;
+        returns the number of lines written
+
+    The files are split into sorted runs of at most run_size lines,
+    which are kept on disk next to filename and merged afterwards, so
+    that the files need not fit in memory. The result is therefore
+    independent of the order in which the files were written.
+    """
+    with TemporaryDirectory(prefix=".merge_", dir=dirname(abspath(filename))) as directory:
+        runs = []
+        for name in filenames:
+            with open(name, 'r', encoding='utf-8') as f:
+                lines = list(islice(f, run_size))
+                while len(lines) > 0:
+                    run = join(directory, "run_{:06d}".format(len(runs)))
+                    with open(run, 'w', encoding='utf-8') as r:
+                        r.writelines(sorted(set(lines)))
+                    runs.append(run)
+
+                    lines = list(islice(f, run_size))
+
+        files = [open(run, 'r', encoding='utf-8') for run in runs]
+        try:
+            nlines = 0
+            previous = None
+            with open(filename, 'w', encoding='utf-8') as f:
+                for line in merge(*files):
+                    if line == previous:
+                        continue
+
+                    f.write(line)
+                    previous = line
+                    nlines += 1
+        finally:
+            for run in files:
+                run.close()
+
+    logger.info("Merged {} files into {} ({} lines)".format(len(filenames), filename, nlines))
+
+    return nlines
+
 def get_ext(sformat):
     if sformat == 'n3':
         return '.n3'
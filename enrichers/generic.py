@@ -13,6 +13,7 @@ from rdf.namespace_wrapper import default_namespace_of
 from rdf.operators import gen_hash,\
                       add_type,\
                       add_property
+from rdf.sinks import TripleBuffer
 from schema.auxiliarly import classname_from_layer,\
                               classname_from_table,\
                               relationname_from_table
@@ -63,19 +64,19 @@ def _enrich(g, database, schema, graph):
                             attributes,
                             properties)
 
-        for binding in graph.query(q).bindings:
-            source_uri = binding[Variable('source_id')]
-            if source_uri is None or source_uri == "":
-                continue
+        # add branches in bulk
+        with TripleBuffer(g) as buffer:
+            for binding in graph.query(q).bindings:
+                source_uri = binding[Variable('source_id')]
+                if source_uri is None or source_uri == "":
+                    continue
 
-            values = { '['+attr+']': binding[Variable(attr)].toPython() for attr in attributes\
-                      if Variable(attr) in binding.keys() }
+                values = { '['+attr+']': binding[Variable(attr)].toPython() for attr in attributes\
+                          if Variable(attr) in binding.keys() }
 
-            g += _generate_branch(schema, ns_abox, target_def, source_uri, values)
-
-def _generate_branch(schema, ns_abox, tail, parent, values):
-    g = Graph()
+                _generate_branch(buffer, schema, ns_abox, target_def, source_uri, values)
 
+def _generate_branch(g, schema, ns_abox, tail, parent, values):
     if type(tail['tail']) is str:
         if tail['type'] == "URIRef":
             class_node = URIRef(tail['head'])
@@ -93,9 +94,7 @@ def _generate_branch(schema, ns_abox, tail, parent, values):
         add_type(g, node, class_node)
         add_property(g, parent, node, URIRef(tail['property']))
 
-        g += _generate_branch(schema, ns_abox, tail['tail'], node, values)
-
-    return g
+        _generate_branch(g, schema, ns_abox, tail['tail'], node, values)
 
 def _generate_tbox_namespace(graph):
     ns_match = match('(?P<base>.*/linked_data/)(?P<database>[a-z]*/)', default_namespace_of(graph)[0])
@@ -0,0 +1,174 @@
+#!/usr/bin/python3
+
+import logging
+import json
+from hashlib import sha1
+from os.path import exists
+
+
+class Catalog():
+    """ Catalog Class
+
+    In-memory index of the columns, primary keys, and foreign keys of all
+    tables in a database. Offers the same per-table lookups as SQLServer,
+    but is loaded with a few set-based queries or from a cached file.
+    """
+
+    database = None
+
+    def __init__(self):
+        self.logger = logging.getLogger(__name__)
+        self.logger.info("Initiating Catalog instance")
+
+        self.clear()
+
+    def load_server(self, server):
+        self.logger.info("Loading catalog from server")
+        self.clear()
+        self.database = server.server.database
+
+        for column in server.all_columns():
+            self._columns.setdefault(column['table_name'], []).append({'column_name': column['column_name'],
+                                                                       'data_type': column['data_type']})
+
+        for key in server.all_primary_keys():
+            self._primary_keys.setdefault(key['table_name'], []).append(key['column_name'])
+
+        for key in server.all_foreign_keys():
+            self._foreign_keys.setdefault(key['table_name'], []).append({'key_name': key['key_name'],
+                                                                         'column_name': key['column_name'],
+                                                                         'referenced_table': key['referenced_table'],
+                                                                         'referenced_column': key['referenced_column']})
+
+        self.logger.info("Catalog holds {} tables".format(len(self._columns)))
+
+    def load_catalog(self, path):
+        self.logger.info("Loading catalog from {}".format(path))
+        with open(path, 'r') as f:
+            catalog = json.load(f)
+
+        self.database = catalog['database']
+        self._columns = catalog['columns']
+        self._primary_keys = catalog['primary_keys']
+        self._foreign_keys = catalog['foreign_keys']
+
+    def write(self, path):
+        self.logger.info("Writing catalog to {}".format(path))
+        with open(path, 'w') as f:
+            json.dump({'database': self.database,
+                       'columns': self._columns,
+                       'primary_keys': self._primary_keys,
+                       'foreign_keys': self._foreign_keys}, f)
+
+    def checksum(self):
+        """ Return a digest of the tables, columns, and keys, which
+            changes whenever the structure of the database does
+        """
+        catalog = json.dumps([self.database, self._columns, self._primary_keys, self._foreign_keys],
+                             sort_keys=True)
+
+        return sha1(catalog.encode()).hexdigest()
+
+    def clear(self):
+        self.database = None
+        self._columns = {}
+        self._primary_keys = {}
+        self._foreign_keys = {}
+
+    ## Lookups ##
+
+    def tables(self):
+        return list(self._columns.keys())
+
+    def list_columns(self, table, include_keys=True):
+        columns = [dict(column) for column in self._columns.get(table, [])]
+        if not include_keys:
+            # like SQLServer.list_columns, this keeps the primary key
+            # column, which downstream tools rely on as attribute
+            skeys = [key['column_name'] for key in self.foreign_keys(table)]
+
+            columns = [column for column in columns if column['column_name'] not in skeys]
+
+        return columns
+
+    def primary_key(self, table):
+        keys = self._primary_keys.get(table, [])
+        if len(keys) == 1:
+            return {'COLUMN_NAME': keys[0]}
+        else:
+            return None
+
+    def foreign_keys(self, table):
+        return [{'column_name': key['column_name'],
+                 'referenced_table': key['referenced_table'],
+                 'referenced_column': key['referenced_column']}
+                for key in self._foreign_keys.get(table, [])]
+
+    def inverse_foreign_keys(self, table):
+        keys = []
+        for foreign_table, foreign_keys in self._foreign_keys.items():
+            for key in foreign_keys:
+                if key['referenced_table'] != table:
+                    continue
+
+                keys.append({'key_name': key['key_name'],
+                             'foreign_table': foreign_table,
+                             'foreign_column': key['column_name'],
+                             'parent_table': key['referenced_table'],
+                             'parent_column': key['referenced_column']})
+
+        return keys
+
+    def dependent_tables(self, table):
+        """ Return the tables which refer to table, each with its referring
+            columns, such that dependents which refer to other dependents
+            are listed after those
+        """
+        columns = {}
+        for key in self.inverse_foreign_keys(table):
+            if key['foreign_table'] == table:
+                continue  # self reference
+
+            columns.setdefault(key['foreign_table'], [])
+            if key['foreign_column'] not in columns[key['foreign_table']]:
+                columns[key['foreign_table']].append(key['foreign_column'])
+
+        # dependents referred to by each dependent
+        parents = {dependent: {key['referenced_table'] for key in self._foreign_keys.get(dependent, [])
+                               if key['referenced_table'] in columns.keys()
+                               and key['referenced_table'] != dependent}
+                   for dependent in columns.keys()}
+
+        ordered = []
+        while len(parents) > 0:
+            ready = sorted(dependent for dependent, referred in parents.items() if len(referred) <= 0)
+            if len(ready) <= 0:
+                # break cycles alphabetically
+                ready = [min(parents.keys())]
+
+            for dependent in ready:
+                ordered.append(dependent)
+                del parents[dependent]
+            for referred in parents.values():
+                referred.difference_update(ready)
+
+        return [(dependent, columns[dependent]) for dependent in ordered]
+
+def load(server, path=None):
+    """ Load catalog of server, using the cached copy at path if it
+        belongs to the same database
+    """
+    catalog = Catalog()
+    if path is not None and exists(path):
+        catalog.load_catalog(path)
+        if catalog.database == server.server.database:
+            return catalog
+
+    catalog.load_server(server)
+    if path is not None:
+        catalog.write(path)
+
+    return catalog
+
+if __name__ == "__main__":
+    print("Catalog")
@@ -6,19 +6,31 @@ from data.auxiliarly import is_readable
 from osgeo import ogr
 
 
+BATCH_SIZE = 10000
+
+# field types read alike through features and Arrow batches
+ARROW_FIELD_TYPES = [ogr.OFTInteger, ogr.OFTInteger64, ogr.OFTReal, ogr.OFTString]
+
 class GeoDataBase():
     """ GDB Class
+
+    If arrow is set, features are read in Arrow batches where the GDAL
+    bindings support that (3.6 and up, with pyarrow) and the fields to
+    read hold no types which Arrow returns differently.
     """
 
     _gdb = None
 
-    def __init__(self, path):
+    def __init__(self, path, arrow=False, batch_size=BATCH_SIZE):
         self.logger = logging.getLogger(__name__)
         self.logger.info("Initiating GDB instance")
 
         ogr.UseExceptions()
         self.load(path)
 
+        self._arrow = arrow
+        self._batch_size = batch_size
+
     def load(self, path):
         driver = ogr.GetDriverByName("OpenFileGDB")
 
@@ -47,8 +59,8 @@ class GeoDataBase():
         if geometry.GetGeometryName() != "POINT":
             geometry = geometry.Centroid()
 
-        if geometry.GetX() >= area.RD_X_MIN and geometry.GetX() <= area.RD_X_MAX and\
-           geometry.GetY() >= area.RD_Y_MIN and geometry.GetY() <= area.RD_Y_MAX:
+        if geometry.GetX() >= area.minimum.x and geometry.GetX() <= area.maximum.x and\
+           geometry.GetY() >= area.minimum.y and geometry.GetY() <= area.maximum.y:
             return True
 
         return False
@@ -59,11 +71,71 @@ class GeoDataBase():
         for idx in range(self._gdb.GetLayerCount()):
             yield self._gdb.GetLayerByIndex(idx)
 
-    def features_of(self, layer_name):
-        # yield dict
+    def features_of(self, layer_name, area=None, fields=None):
+        """ Yield the features of a layer, in the order they are stored
+
+        If area is given, only those features are read of which the
+        envelope intersects it, which the driver decides using its
+        spatial index. These are candidates: their centroids, as tested
+        by within(), may still fall outside the area. If fields is given,
+        other attributes are not read and hold None.
+        """
         layer = self._gdb.GetLayerByName(layer_name)
-        for idx in range(1, layer.GetFeatureCount()+1):
-            yield layer.GetFeature(idx)
+        if area is not None:
+            layer.SetSpatialFilterRect(area.minimum.x, area.minimum.y, area.maximum.x, area.maximum.y)
+        if fields is not None:
+            layer.SetIgnoredFields([field.GetName() for field in self._field_definitions(layer)
+                                    if field.GetName() not in fields])
+
+        try:
+            if self._arrow and self._reads_arrow(layer, fields):
+                features = self._arrow_features_of(layer)
+            else:
+                features = self._sequential_features_of(layer)
+
+            for feature in features:
+                yield feature
+        finally:
+            layer.SetIgnoredFields([])
+            layer.SetSpatialFilter(None)
+
+    def _sequential_features_of(self, layer):
+        layer.ResetReading()
+        feature = layer.GetNextFeature()
+        while feature is not None:
+            yield feature
+            feature = layer.GetNextFeature()
+
+    def _arrow_features_of(self, layer):
+        fid_column = layer.GetFIDColumn() or "OGC_FID"
+        geometry_column = layer.GetGeometryColumn() or "wkb_geometry"
+
+        stream = layer.GetArrowStreamAsPyArrow(["INCLUDE_FID=YES",
+                                                "MAX_FEATURES_IN_BATCH={}".format(self._batch_size)])
+        for batch in stream:
+            for values in batch.to_pylist():
+                fid = values.pop(fid_column)
+                wkb = values.pop(geometry_column, None)
+                geometry = ogr.CreateGeometryFromWkb(wkb) if wkb is not None else None
+
+                yield ArrowFeature(fid, values, geometry)
+
+    def _reads_arrow(self, layer, fields=None):
+        if not hasattr(layer, 'GetArrowStreamAsPyArrow'):
+            return False
+
+        for field in self._field_definitions(layer):
+            if fields is not None and field.GetName() not in fields:
+                continue
+            if field.GetType() not in ARROW_FIELD_TYPES or field.GetSubType() != ogr.OFSTNone:
+                return False
+
+        return True
+
+    def _field_definitions(self, layer):
+        definition = layer.GetLayerDefn()
+        for idx in range(definition.GetFieldCount()):
+            yield definition.GetFieldDefn(idx)
 
     def fields_of(self, feature):
         for k,v in feature.items():
@@ -75,5 +147,28 @@ class GeoDataBase():
                     'value': v,
                     'datatype': datatype }
 
+class ArrowFeature():
+    """ Arrow Feature Class
+
+    Feature read from an Arrow batch, offering those methods of an OGR
+    feature which are needed to translate it.
+    """
+
+    __slots__ = ['_fid', '_values', '_geometry']
+
+    def __init__(self, fid, values, geometry):
+        self._fid = fid
+        self._values = values
+        self._geometry = geometry
+
+    def GetFID(self):
+        return self._fid
+
+    def GetGeometryRef(self):
+        return self._geometry
+
+    def items(self):
+        return self._values
+
 if __name__ == "__main__":
     print("GeoDataBase Wrapper")
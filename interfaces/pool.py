@@ -0,0 +1,118 @@
+#!/usr/bin/python3
+
+import logging
+from contextlib import contextmanager
+from queue import Queue, Empty
+from threading import Lock
+
+
+class ConnectionPool():
+    """ Connection Pool Class
+
+    Hands out up to size reusable DB-API connections created by factory.
+    Idle connections are checked with a cheap query before reuse and
+    replaced if they went stale. Connections released after the pool is
+    closed are closed rather than kept.
+    """
+
+    def __init__(self, factory, size=1, health_check="SELECT 1"):
+        self.logger = logging.getLogger(__name__)
+        self.logger.info("Initiating Connection Pool instance ({} connections)".format(size))
+
+        if size < 1:
+            raise ValueError("Pool size must be at least 1")
+
+        self._factory = factory
+        self._size = size
+        self._health_check = health_check
+        self._idle = Queue()
+        self._created = 0
+        self._closed = False
+        self._lock = Lock()
+
+    def acquire(self, timeout=None):
+        while True:
+            try:
+                connection = self._idle.get_nowait()
+            except Empty:
+                connection = self._create()
+                if connection is not None:
+                    return connection
+
+                # pool exhausted; wait for a release
+                connection = self._idle.get(timeout=timeout)
+
+            if self.is_alive(connection):
+                return connection
+
+            # free its slot, so that a failing replacement is not counted
+            self.logger.info("Replacing stale connection")
+            self._close(connection)
+            with self._lock:
+                self._created -= 1
+
+    def release(self, connection):
+        with self._lock:
+            if not self._closed:
+                self._idle.put(connection)
+                return
+
+        self._close(connection)
+
+    @contextmanager
+    def connection(self, timeout=None):
+        connection = self.acquire(timeout)
+        try:
+            yield connection
+        finally:
+            self.release(connection)
+
+    def is_alive(self, connection):
+        try:
+            cursor = connection.cursor()
+            cursor.execute(self._health_check)
+            cursor.fetchall()
+            cursor.close()
+        except Exception:
+            return False
+
+        return True
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+
+        while True:
+            try:
+                connection = self._idle.get_nowait()
+            except Empty:
+                break
+
+            self._close(connection)
+
+        with self._lock:
+            self._created = 0
+
+    def _create(self):
+        with self._lock:
+            if self._closed:
+                raise ValueError("Connection pool is closed")
+            if self._created >= self._size:
+                return None
+            self._created += 1
+
+        try:
+            return self._factory()
+        except Exception:
+            with self._lock:
+                self._created -= 1
+            raise
+
+    def _close(self, connection):
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+if __name__ == "__main__":
+    print("Connection Pool")
@@ -1,53 +1,94 @@
 #!/usr/bin/python3
 
 import logging
+from contextlib import contextmanager
+from copy import copy
+from itertools import islice
 from re import match
 
 from pymssql import connect
 
+from interfaces.pool import ConnectionPool
+
+
+MAX_PARAMETERS = 2000  # SQL Server allows up to 2100 parameters per statement
+BATCH_SIZE = 10000
 
 class SQLServer():
     """ SQL Server Class
     """
     server = None
 
-    def __init__(self, server=None):
+    def __init__(self, server=None, pool_size=1):
         self.logger = logging.getLogger(__name__)
         self.logger.info("Initiating SQL Server instance")
 
         self._import_config(server)
-        self.connect()
+        self.connect(pool_size)
         self.select_database(self.server.database)
 
-    def query(self, query, as_dict=True):
-        self._cursor = self._connection.cursor(as_dict=as_dict)
-        self._cursor.execute(query)
+    def query(self, query, params=None, as_dict=True):
+        cursor = self._connection.cursor(as_dict=as_dict)
+        cursor.execute(query, params)
+
+        return cursor
+
+    def page(self, query, params=None, as_dict=True):
+        """ Fetch all results at once and release the cursor
+        """
+        cursor = self.query(query, params, as_dict)
+        rows = cursor.fetchall()
+        cursor.close()
+
+        return rows
+
+    def stream(self, query, params=None, as_dict=True, batch_size=BATCH_SIZE):
+        """ Yield results in batches of at most batch_size rows
+        """
+        cursor = self.query(query, params, as_dict)
+        try:
+            batch = cursor.fetchmany(batch_size)
+            while len(batch) > 0:
+                for row in batch:
+                    yield row
 
-        return self._cursor
+                batch = cursor.fetchmany(batch_size)
+        finally:
+            cursor.close()
+
+    def connect(self, pool_size=1):
+        self._connection = self._connect()
+        self._pool = ConnectionPool(self._connect, pool_size)
 
-    def connect(self):
-        self._connection = connect(server=self.server.servername,
-                                   port=self.server.serverport,
-                                   user=self.server.username,
-                                   password=self.server.password,
-                                   database=self.server.database)
     def disconnect(self):
+        self._pool.close()
         self._connection.close()
 
+    @contextmanager
+    def session(self, timeout=None):
+        """ Yield a copy of this instance bound to a pooled connection
+
+        Sessions let workers query the server in parallel; the
+        connection returns to the pool afterwards.
+        """
+        with self._pool.connection(timeout) as connection:
+            session = copy(self)
+            session._connection = connection
+
+            yield session
+
+    def _connect(self):
+        return connect(server=self.server.servername,
+                       port=self.server.serverport,
+                       user=self.server.username,
+                       password=self.server.password,
+                       database=self.server.database)
+
     def select_database(self, database):
         self.query("USE [{}]".format(database))
 
     def _import_config(self, config):
-        m = match('([a-zA-Z][a-zA-Z0-9@$#_]*):(.*)@(.*):([0-9]*)/([a-zA-Z][a-zA-Z0-9@$#_]*)/([a-zA-Z][a-zA-Z0-9@$#_]*)', config)
-        if m is None:
-            raise Exception("Server login configuration fault")
-        else:
-            self.server = self.Config(m.group(3),  # servername
-                                      m.group(4),  # serverport
-                                      m.group(5),  # database
-                                      m.group(6),  # schema
-                                      m.group(1),  # username
-                                      m.group(2))  # password
+        self.server = parse_config(config)
 
     ## Predefined Queries ##
 
@@ -132,16 +173,142 @@ class SQLServer():
 
         return [k for k in self.query(q)]
 
-    ## Generators ##
+    ## Catalog Queries ##
+
+    def all_columns(self):
+        q = """SELECT TABLE_NAME AS table_name,
+                      COLUMN_NAME AS column_name,
+                      DATA_TYPE AS data_type
+               FROM INFORMATION_SCHEMA.COLUMNS
+               ORDER BY TABLE_NAME, ORDINAL_POSITION"""
 
-    def records(self, table, select='*', where=None):
-        q = """SELECT {} FROM {}""".format(select, self.server.absolute(table))
+        return self.page(q)
+
+    def all_primary_keys(self):
+        q = """SELECT TABLE_NAME AS table_name, COLUMN_NAME AS column_name
+                FROM INFORMATION_SCHEMA.KEY_COLUMN_USAGE
+                WHERE OBJECTPROPERTY(OBJECT_ID(CONSTRAINT_SCHEMA + '.' + QUOTENAME(CONSTRAINT_NAME)), 'IsPrimaryKey') = 1
+                AND TABLE_CATALOG = '{}'""".format(self.server.database)
 
+        return self.page(q)
+
+    def all_foreign_keys(self):
+        q = """SELECT  tab1.name AS [table_name],
+                       OBJECT_NAME(fkc.constraint_object_id) AS [key_name],
+                       col1.name AS [column_name],
+                       tab2.name AS [referenced_table],
+                       col2.name AS [referenced_column]
+                FROM sys.foreign_key_columns fkc
+                INNER JOIN sys.tables tab1 ON tab1.object_id = fkc.parent_object_id
+                INNER JOIN sys.columns col1 ON col1.column_id = parent_column_id AND col1.object_id = tab1.object_id
+                INNER JOIN sys.tables tab2 ON tab2.object_id = fkc.referenced_object_id
+                INNER JOIN sys.columns col2 ON col2.column_id = referenced_column_id AND col2.object_id = tab2.object_id"""
+
+        return self.page(q)
+
+    def key_ranges(self, table, key, n, where=None):
+        """ Split the values of key into at most n ranges holding about
+            as many records each; returns (low, high) pairs, both inclusive
+        """
+        q = """SELECT MIN([{0}]) AS low, MAX([{0}]) AS high
+               FROM (SELECT [{0}], NTILE({1}) OVER (ORDER BY [{0}]) AS tile
+                     FROM {2}{3}) AS tiles
+               GROUP BY tile
+               ORDER BY tile""".format(key,
+                                       int(n),
+                                       self.server.absolute(table),
+                                       " WHERE {}".format(where) if where is not None else "")
+
+        return [(r['low'], r['high']) for r in self.page(q)]
+
+    def row_counts(self):
+        """ Return the number of rows per table, as kept by the server
+        """
+        q = """SELECT tab.name AS table_name, SUM(par.rows) AS row_count
+               FROM sys.tables tab
+               INNER JOIN sys.partitions par ON par.object_id = tab.object_id AND par.index_id IN (0, 1)
+               GROUP BY tab.name"""
+
+        return {r['table_name']: r['row_count'] for r in self.page(q)}
+
+    def count(self, table, where=None):
+        q = """SELECT COUNT(*) AS n FROM {}""".format(self.server.absolute(table))
         if where is not None:
             q += " WHERE {}".format(where)
 
-        for rec in self.query(q):
-            yield rec
+        return self.page(q)[0]['n']
+
+    def sample(self, table, n, select='*'):
+        """ Return up to n records of table, as stored
+        """
+        q = """SELECT TOP ({}) {} FROM {}""".format(int(n), select, self.server.absolute(table))
+
+        return self.page(q)
+
+    ## Generators ##
+
+    def records(self, table, select='*', where=None, key=None, batch_size=BATCH_SIZE):
+        """ Yield records of table
+
+        If key is given, records are retrieved in pages of batch_size
+        rows ordered on that column (keyset pagination), which must then
+        be part of the selection. Each page is fetched completely before
+        it is yielded, so other queries can be run in between.
+        """
+        if key is None:
+            q = """SELECT {} FROM {}""".format(select, self.server.absolute(table))
+
+            if where is not None:
+                q += " WHERE {}".format(where)
+
+            for rec in self.stream(q, batch_size=batch_size):
+                yield rec
+
+            return
+
+        last_key = None
+        while True:
+            conditions = [] if where is None else ["({})".format(where)]
+            params = None
+            if last_key is not None:
+                conditions.append("[{}] > %s".format(key))
+                params = (last_key,)
+
+            q = """SELECT TOP ({}) {} FROM {}""".format(batch_size, select, self.server.absolute(table))
+            if len(conditions) > 0:
+                q += " WHERE {}".format(" AND ".join(conditions))
+            q += " ORDER BY [{}]".format(key)
+
+            recs = self.page(q, params)
+            for rec in recs:
+                yield rec
+
+            if len(recs) < batch_size:
+                break
+
+            last_key = recs[-1][key]
+
+    def records_in(self, table, column, values, select='*', where=None, batch_size=MAX_PARAMETERS):
+        """ Yield only those records of which column holds one of values
+
+        Values are sent in parameterized IN-batches to let the server
+        do the filtering, and are expected to be unique.
+        """
+        values = iter(values)
+        batch = list(islice(values, batch_size))
+        while len(batch) > 0:
+            q = """SELECT {} FROM {} WHERE [{}] IN ({})""".format(select,
+                                                                self.server.absolute(table),
+                                                                column,
+                                                                ", ".join(["%s"] * len(batch)))
+
+            if where is not None:
+                q += " AND ({})".format(where)
+
+            for rec in self.page(q, tuple(batch)):
+                yield rec
+
+            batch = list(islice(values, batch_size))
 
     ## Server Config ##
 
@@ -164,5 +331,20 @@ class SQLServer():
         def absolute(self, table):
             return ".".join([self.database, self.schema, table])
 
+def parse_config(config):
+    """ Parse a login configuration of the form
+        <username>:<password>@<host:port>/<database>/<schema>
+    """
+    m = match('([a-zA-Z][a-zA-Z0-9@$#_]*):(.*)@(.*):([0-9]*)/([a-zA-Z][a-zA-Z0-9@$#_]*)/([a-zA-Z][a-zA-Z0-9@$#_]*)', config)
+    if m is None:
+        raise Exception("Server login configuration fault")
+
+    return SQLServer.Config(m.group(3),  # servername
+                            m.group(4),  # serverport
+                            m.group(5),  # database
+                            m.group(6),  # schema
+                            m.group(1),  # username
+                            m.group(2))  # password
+
 if __name__ == "__main__":
     print("SQL Server")
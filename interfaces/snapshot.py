@@ -0,0 +1,202 @@
+#!/usr/bin/python3
+
+import logging
+import json
+from contextlib import contextmanager, ExitStack
+from copy import copy
+from hashlib import sha1
+from os import listdir, makedirs, replace
+from os.path import exists, join
+from shutil import rmtree
+from tempfile import mkdtemp
+from threading import Lock
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from interfaces.catalog import Catalog, load as load_catalog
+from interfaces.server import parse_config, BATCH_SIZE
+
+
+PART_SIZE = 100000  # rows per Parquet file
+KEY_COLUMN = "__snapshot_key"
+
+class SnapshotServer():
+    """ Snapshot Server Class
+
+    Offers the same records() and records_in() generators as SQLServer,
+    but reads them from local Parquet snapshots of the extracted tables.
+    A snapshot is keyed by table, selection, condition, and the checksum
+    of the catalog, and is taken the first time it is asked for. Other
+    queries are passed to the server, to which is only connected once
+    needed; with a cached catalog and complete snapshots, translations
+    run offline.
+
+    The checksum is computed from the current catalog of the server if
+    it can be reached, and from the cached catalog otherwise; remove the
+    cached catalog after changes to the database structure when working
+    offline. Snapshots are not refreshed when the data changes; remove
+    the directory to start over.
+    """
+
+    def __init__(self, server, directory, connect, catalog_path=None):
+        self.logger = logging.getLogger(__name__)
+        self.logger.info("Initiating Snapshot Server instance at {}".format(directory))
+
+        self.server = parse_config(server)
+        self.directory = directory
+        makedirs(directory, exist_ok=True)
+
+        self._source = None
+        self._open = connect
+        self._lock = Lock()
+
+        self.checksum = self._catalog(catalog_path).checksum()
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+
+        return getattr(self.source(), name)
+
+    def source(self):
+        """ Return the server, connecting to it if not done yet
+        """
+        with self._lock:
+            if self._source is None:
+                self.logger.info("Connecting to server")
+                self._source = self._open()
+
+        return self._source
+
+    def disconnect(self):
+        if self._source is not None:
+            self._source.disconnect()
+            self._source = None
+
+    @contextmanager
+    def session(self, timeout=None):
+        """ Yield a copy of this instance, which is bound to a pooled
+            connection once it has to query the server
+        """
+        with ExitStack() as stack:
+            session = copy(self)
+            session._source = None
+            session._open = lambda: stack.enter_context(self.source().session(timeout))
+            session._lock = Lock()
+
+            yield session
+
+    def _catalog(self, catalog_path):
+        """ Return the current catalog of the server, refreshing the cached
+            copy at catalog_path, or the cached copy if not connected
+        """
+        try:
+            self.source()
+        except Exception as e:
+            self.logger.warning("Server unreachable ({}); using cached catalog".format(e))
+            return load_catalog(self, catalog_path)
+
+        catalog = Catalog()
+        catalog.load_server(self)
+        if catalog_path is not None:
+            catalog.write(catalog_path)
+
+        return catalog
+
+    ## Generators ##
+
+    def records(self, table, select='*', where=None, key=None, batch_size=BATCH_SIZE):
+        """ Yield records of table, ordered on key if given
+        """
+        path = self._path(table, select, where, key)
+        if not exists(path):
+            records = self.source().records(table, select=select, where=where, key=key, batch_size=batch_size)
+            self._take(path, table, records)
+
+        for rec in self._read(path, batch_size):
+            yield rec
+
+    def records_in(self, table, column, values, select='*', where=None, batch_size=BATCH_SIZE):
+        """ Yield only those records of which column holds one of values
+
+        The snapshot holds all records of table, together with the values
+        of column, which are filtered locally.
+        """
+        path = self._path(table, select, where, None, column)
+        if not exists(path):
+            records = self.source().records(table,
+                                            select="{}, [{}] AS [{}]".format(select, column, KEY_COLUMN),
+                                            where=where,
+                                            batch_size=batch_size)
+            self._take(path, table, records)
+
+        if not hasattr(values, '__contains__'):
+            values = set(values)
+
+        for rec in self._read(path, batch_size):
+            if rec.pop(KEY_COLUMN) in values:
+                yield rec
+
+    ## Snapshots ##
+
+    def _path(self, table, *query):
+        digest = sha1(json.dumps([table, self.checksum] + list(query)).encode()).hexdigest()
+
+        return join(self.directory, table, digest)
+
+    def _take(self, path, table, records):
+        """ Write records to Parquet files in a new snapshot directory at
+            path, which only appears once it is complete
+        """
+        self.logger.info("Taking snapshot of {}".format(table))
+        makedirs(join(self.directory, table), exist_ok=True)
+        tmp = mkdtemp(prefix=".tmp_", dir=join(self.directory, table))
+
+        try:
+            part = []
+            nparts = 0
+            for rec in records:
+                part.append(rec)
+                if len(part) >= PART_SIZE:
+                    _write_part(join(tmp, "part-{:05d}.parquet".format(nparts)), part)
+                    part = []
+                    nparts += 1
+
+            if len(part) > 0:
+                _write_part(join(tmp, "part-{:05d}.parquet".format(nparts)), part)
+
+            replace(tmp, path)
+        except OSError:
+            if not exists(path):
+                raise
+            # taken by another session in the meantime
+        finally:
+            if exists(tmp):
+                rmtree(tmp)
+
+    def _read(self, path, batch_size):
+        for filename in sorted(listdir(path)):
+            for batch in pq.ParquetFile(join(path, filename)).iter_batches(batch_size=batch_size):
+                for rec in batch.to_pylist():
+                    yield rec
+
+def _write_part(filename, records):
+    try:
+        table = pa.Table.from_pylist(records)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        # keep values which Arrow does not support as text
+        columns = {}
+        for name in records[0].keys():
+            values = [rec[name] for rec in records]
+            try:
+                columns[name] = pa.array(values)
+            except (pa.ArrowInvalid, pa.ArrowTypeError):
+                columns[name] = pa.array([None if v is None else str(v) for v in values])
+
+        table = pa.table(columns)
+
+    pq.write_table(table, filename)
+
+if __name__ == "__main__":
+    print("Snapshot Server")
@@ -2,23 +2,46 @@
 
 import logging
 import argparse
+from multiprocessing import Pool
+from os import remove
+from os.path import exists, splitext
 from time import time
 
+from rdflib.term import URIRef
+
 from data.auxiliarly import is_writable
-from data.writers.rdf import write
+from data.readers.rdf import read
+from data.writers.rdf import write, get_ext, merge_lines
+from interfaces.catalog import load as load_catalog
 from interfaces.geodatabase import GeoDataBase
 from interfaces.server import SQLServer
 from interfaces.schemas.databases import SchemaDB
+from rdf.metadata import add_metadata, update_metadata
+from rdf.operators import gen_hash, set_hash_options, hash_cache_info, HASH_CACHE_SIZE, HASH_DIGESTS
+from rdf.sinks import FileSink
+from rdf.stores import STORES, open_graph, is_persistent, store_path_of
 from geo.area import Area
-from translators.abox.disk import translate as translate_disk
-from translators.abox.ultimo import translate as translate_ultimo
+from translators.abox.disk import translate as translate_disk, root_ranges as root_ranges_disk,\
+                                  estimate as estimate_disk
+from translators.abox.ultimo import translate as translate_ultimo, root_ranges as root_ranges_ultimo,\
+                                    estimate as estimate_ultimo
+from translators.abox import estimate, generic_sql
 from translators.abox.edo import translate as translate_edo
 from translators.abox.kernGIS import translate as translate_kernGIS
+from translators.abox import metrics
+from translators.abox.pipeline import set_pipeline_options, BATCH_SIZE as PIPELINE_BATCH_SIZE
+from translators.abox.columnar import set_columnar_options, BATCH_SIZE as COLUMNAR_BATCH_SIZE
+from translators.abox.incremental import load_state, save_state, watermarks, changed_references, delta
+from translators.references.checkpoint import Checkpoint
+from translators.references.reference_manager import ReferenceManager, set_spill_options
 from ui.progress_indicator import ProgressIndicator
 
 
 def run(args, timestamp):
     pi = ProgressIndicator()
+    logger = logging.getLogger(__name__)
+
+    _configure(args)
 
     # load database mapping table
     mapping = SchemaDB(args.database_schema)
@@ -39,40 +62,269 @@ def run(args, timestamp):
                     float(args.area[2]),
                     float(args.area[3]))
 
+    if args.resume and args.checkpoint_directory is None:
+        raise Exception("Resuming requires a checkpoint directory")
+
+    # only predict the size of the translation if requested
+    if args.estimate:
+        if args.gdb is not None:
+            raise Exception("Estimation requires an SQL source")
+
+        _run_estimate(args, database, mapping, scope, output_path)
+        return
+
+    # only translate what changed since the last run if requested
+    if args.state is not None:
+        if args.gdb is not None or args.stream:
+            raise Exception("Incremental translation requires an SQL source and no streaming")
+
+        _run_incremental(args, database, mapping, scope, timestamp, output_path)
+        return
+
+    # split the translation over processes if requested
+    if args.shards > 1:
+        if args.gdb is not None or args.checkpoint_directory is not None or is_persistent(args.store):
+            raise Exception("Sharded translation requires an SQL source and no checkpoints or persistent stores")
+        if args.serialization_format not in ['ntriples', 'nquads']:
+            raise Exception("Sharded translation requires ntriples or nquads as serialization format")
+
+        _run_sharded(args, database, scope, timestamp, output_path)
+        return
+
+    # stream triples straight to disk if requested
+    sink = None
+    if args.stream:
+        if splitext(output_path)[1] == '':
+            output_path += get_ext(args.serialization_format)
+        sink = FileSink(output_path, args.serialization_format, gen_hash(database.upper(), timestamp))
+    elif is_persistent(args.store):
+        # start afresh, to not mix in triples of an earlier run
+        sink = open_graph(gen_hash(database.upper(), timestamp),
+                          args.store,
+                          store_path_of(args.store_directory, output_path, args.store),
+                          fresh=True)
+
     # translate database to RDF
     print("Translating {}...".format(database.upper()))
     pi.start()
     if args.gdb is not None:
-        graph = _run_gdb(args.gdb, mapping, scope, timestamp)
+        graph = _run_gdb(args, mapping, scope, timestamp, sink)
     else:
-        graph = _run_sql(args.server, database, mapping, scope, timestamp)
+        graph = _run_sql(args, database, mapping, scope, timestamp, sink)
     pi.stop()
 
+    logger.info("URI cache: {hits} hits, {misses} misses, {size}/{maxsize} entries ({hit_rate:.1%} hit rate)"
+                .format(**hash_cache_info()))
+    _report_metrics(metrics.current().report(), output_path)
+
     # write graph
-    print("Writing graph to disk...")
-    write(graph, output_path, args.serialization_format)
+    if args.stream:
+        sink.close()
+    else:
+        print("Writing graph to disk...")
+        write(graph, output_path, args.serialization_format)
+        graph.close()
+
+def _report_metrics(report, output_path):
+    metrics.write_report(report, splitext(output_path)[0] + ".metrics.json")
+    print(metrics.summary(report))
+
+def _configure(args):
+    # configure URI minting
+    set_hash_options(args.hash_cache_size, args.hash_digest)
+
+    # configure fetch and translate pipeline
+    set_pipeline_options(args.pipeline, args.pipeline_batch_size)
+
+    # translate database records in column batches when streaming
+    set_columnar_options(args.columnar, args.columnar_batch_size)
 
-def _run_gdb(gdb_path, mapping, scope, timestamp):
-    gdb = GeoDataBase(gdb_path)
-    return translate_kernGIS(gdb, mapping, scope, timestamp)
+    # configure reference spilling
+    if args.reference_memory is not None:
+        set_spill_options(args.reference_memory * 2**20, args.spill_directory)
 
-def _run_sql(server, database, mapping, scope, timestamp):
+def _run_gdb(args, mapping, scope, timestamp, sink=None):
+    gdb = GeoDataBase(args.gdb, arrow=args.gdb_arrow)
+    return translate_kernGIS(gdb, mapping, scope, timestamp, sink)
+
+def _run_sql(args, database, mapping, scope, timestamp, sink=None):
     # connect to server
     print("Connecting to server...")
-    server = SQLServer(server)
+    server = _open_server(args, pool_size=max(args.connections, args.workers))
+
+    # save progress to resume from on failure
+    checkpoint = None
+    if args.checkpoint_directory is not None:
+        checkpoint = Checkpoint(args.checkpoint_directory, args.resume)
 
-    graph = translate_database(server, database, mapping, scope, timestamp)
+    graph = translate_database(server, database, mapping, scope, timestamp, args.workers, sink,
+                               checkpoint=checkpoint, catalog_path=args.catalog)
 
     # close connection
     server.disconnect()
 
     return graph
 
-def translate_database(server, database, mapping, scope, timestamp):
+def _open_server(args, pool_size=1):
+    if args.snapshot_directory is None:
+        return SQLServer(args.server, pool_size=pool_size)
+
+    # read extracted tables from local snapshots, which requires pyarrow
+    from interfaces.snapshot import SnapshotServer
+    return SnapshotServer(args.server, args.snapshot_directory,
+                          lambda: SQLServer(args.server, pool_size=pool_size),
+                          catalog_path=args.catalog)
+
+def _run_incremental(args, database, mapping, scope, timestamp, output_path):
+    pi = ProgressIndicator()
+
+    # connect to server
+    print("Connecting to server...")
+    server = _open_server(args, pool_size=max(args.connections, args.workers))
+
+    # mark current state before extracting anything
+    marks = watermarks(server, mapping.schema['schema'].keys(), catalog_path=args.catalog)
+
+    references = ReferenceManager()
+    visited = ReferenceManager()
+    changed = None
+    if exists(args.state):
+        previous_marks, visited, previous_output = load_state(args.state)
+
+        # retranslate changed records
+        changed = changed_references(server, mapping, previous_marks, visited)
+        visited.difference_update(changed)
+        for table, record_ids in changed.references():
+            references.add_references(table, set(record_ids))
+
+    print("Translating {}...".format(database.upper()))
+    pi.start()
+    graph = translate_database(server, database, mapping, scope, timestamp, args.workers,
+                               references=references, visited=visited, catalog_path=args.catalog)
+    pi.stop()
+    _report_metrics(metrics.current().report(), output_path)
+
+    # close connection
+    server.disconnect()
+
+    if splitext(output_path)[1] == '':
+        output_path += get_ext(args.serialization_format)
+
+    if changed is not None:
+        print("Computing changes...")
+        previous = read(previous_output)
+        base = URIRef(dict(graph.namespaces())["rws.{}".format(database)])
+        additions, removals = delta(previous, graph, changed, mapping, base)
+
+        stem, ext = splitext(output_path)
+        write(additions, stem + "-additions" + ext, args.serialization_format)
+        write(removals, stem + "-removals" + ext, args.serialization_format)
+
+        # apply changes to previous output
+        previous += additions
+        previous -= removals
+        update_metadata(previous, base, timestamp)
+        graph = previous
+
+    print("Writing graph to disk...")
+    write(graph, output_path, args.serialization_format)
+
+    save_state(args.state, marks, visited, output_path)
+
+def _run_estimate(args, database, mapping, scope, output_path):
+    print("Connecting to server...")
+    server = SQLServer(args.server)
+
+    print("Estimating {}...".format(database.upper()))
+    if database == "disk":
+        report = estimate_disk(server, mapping, scope, args.catalog)
+    elif database == "ultimo":
+        report = estimate_ultimo(server, mapping, scope, args.catalog)
+    else:
+        raise NotImplementedError("No support for estimating specified database")
+
+    server.disconnect()
+
+    estimate.write_estimate(report, splitext(output_path)[0] + ".estimate.json")
+    print(estimate.summary(report))
+
+def _run_sharded(args, database, scope, timestamp, output_path):
+    pi = ProgressIndicator()
+
+    if splitext(output_path)[1] == '':
+        output_path += get_ext(args.serialization_format)
+    stem, ext = splitext(output_path)
+
+    # split the root records in ranges of about equal size
+    print("Connecting to server...")
+    server = SQLServer(args.server)
+    ranges = root_ranges(server, database, scope, args.shards)
+    if len(ranges) <= 0:
+        ranges = [None]  # nothing to split
+    if args.catalog is not None:
+        load_catalog(server, args.catalog)  # cache once for all shards
+    server.disconnect()
+
+    shard_paths = ["{}.shard_{:03d}{}".format(stem, i, ext) for i in range(len(ranges))]
+
+    print("Translating {} in {} shards...".format(database.upper(), len(ranges)))
+    pi.start()
+    with Pool(processes=len(ranges)) as pool:
+        reports = pool.starmap(_translate_shard, [(args, scope, timestamp, root_range, shard_path)
+                                                  for root_range, shard_path in zip(ranges, shard_paths)])
+    pi.stop()
+    _report_metrics(metrics.merge_reports(reports), output_path)
+
+    print("Merging shards...")
+    nlines = merge_lines(shard_paths, output_path)
+    for shard_path in shard_paths:
+        remove(shard_path)
+
+    # add meta data once, counting the triples of all shards
+    sink = FileSink(output_path, args.serialization_format, gen_hash(database.upper(), timestamp), append=True)
+    generic_sql._override_namespaces(database)
+    generic_sql._update_namespaces(sink.namespace_manager)
+    add_metadata(sink, "rws.{}".format(database), timestamp, database, extra_triples=nlines)
+    sink.close()
+
+def _translate_shard(args, scope, timestamp, root_range, shard_path):
+    """ Translate the root records in root_range, and everything these
+        lead to, on a connection of its own; returns the metrics report
+    """
+    _configure(args)
+    metrics.current().clear()
+
+    mapping = SchemaDB(args.database_schema)
+    database = mapping.database_name()
+
+    server = _open_server(args, pool_size=max(args.connections, args.workers))
+    sink = FileSink(shard_path, args.serialization_format, gen_hash(database.upper(), timestamp))
+
+    translate_database(server, database, mapping, scope, timestamp, args.workers, sink,
+                       catalog_path=args.catalog, root_range=root_range, metadata=False)
+
+    sink.close()
+    server.disconnect()
+
+    return metrics.current().report()
+
+def root_ranges(server, database, scope, n):
+    if database == "disk":
+        return root_ranges_disk(server, scope, n)
+    elif database == "ultimo":
+        return root_ranges_ultimo(server, scope, n)
+    else:
+        raise NotImplementedError("No support for sharding specified database")
+
+def translate_database(server, database, mapping, scope, timestamp, workers=1, sink=None,
+                       references=None, visited=None, checkpoint=None, catalog_path=None, root_range=None,
+                       metadata=True):
     if database == "disk":
-        return translate_disk(server, mapping, scope, timestamp)
+        return translate_disk(server, mapping, scope, timestamp, workers, sink, references, visited, checkpoint,
+                              catalog_path, root_range, metadata)
     elif database == "ultimo":
-        return translate_ultimo(server, mapping, scope, timestamp)
+        return translate_ultimo(server, mapping, scope, timestamp, workers, sink, references, visited, checkpoint,
+                                catalog_path, root_range, metadata)
     elif database == "edo":
         return translate_edo(server, mapping, scope, timestamp)
     else:
@@ -114,9 +366,46 @@ if __name__ == "__main__":
     parser.add_argument("-s", "--server", help="""Login configuration of Microsoft SQL server:
                         '--server <user>:<password>@<server[:<port>]></database>'""",\
                         default=None)
+    parser.add_argument("--connections", help="Maximum number of pooled server connections", type=int, default=1)
+    parser.add_argument("--workers", help="Number of tables to translate in parallel (uses pooled connections)",
+                        type=int, default=1)
+    parser.add_argument("--estimate", help="""[SQL] Only estimate the number of rows, triples, and bytes the
+                        translation of the area would yield, without translating""", action="store_true")
+    parser.add_argument("--shards", help="""[SQL] Number of processes to split the root records over; each writes
+                        its own file, which are merged afterwards (ntriples and nquads only)""", type=int, default=1)
+    parser.add_argument("--pipeline", help="""Number of threads per table or layer to translate records with while
+                        the next are fetched (0 disables)""", type=int, default=0)
+    parser.add_argument("--pipeline_batch_size", help="Number of records per pipeline batch", type=int,
+                        default=PIPELINE_BATCH_SIZE)
+    parser.add_argument("--columnar", help="""[SQL] Translate records in column batches straight to N-Triples lines
+                        when writing these (with --stream or --shards)""", action="store_true")
+    parser.add_argument("--columnar_batch_size", help="Number of records per column batch", type=int,
+                        default=COLUMNAR_BATCH_SIZE)
+    parser.add_argument("--hash_cache_size", help="Number of minted URIs to cache", type=int, default=HASH_CACHE_SIZE)
+    parser.add_argument("--hash_digest", help="Digest used to mint URIs (only sha1 matches earlier output)",
+                        choices=sorted(HASH_DIGESTS.keys()), default='sha1')
+    parser.add_argument("--stream", help="Write triples to the output while translating (ntriples and nquads only)",
+                        action="store_true")
+    parser.add_argument("--store", help="Graph store backend; persistent stores are reused on later runs",
+                        choices=STORES, default='default')
+    parser.add_argument("--store_directory", help="Where to keep persistent graph stores", default="./")
+    parser.add_argument("--state", help="""[SQL] Translation state (JSON) for incremental runs; if it exists, only
+                        changed and new records are translated and the changes are written next to the output""",
+                        default=None)
+    parser.add_argument("--checkpoint_directory", help="[SQL] Where to save progress after every iteration",
+                        default=None)
+    parser.add_argument("--resume", help="[SQL] Continue from the last checkpoint", action="store_true")
+    parser.add_argument("--reference_memory", help="[SQL] Memory (MB) for references before they spill to disk",
+                        type=int, default=None)
+    parser.add_argument("--spill_directory", help="[SQL] Where to spill references to", default="./")
+    parser.add_argument("--catalog", help="[SQL] Optional cache file (JSON) of the database catalog", default=None)
+    parser.add_argument("--snapshot_directory", help="""[SQL] Where to keep local snapshots (Parquet) of the extracted
+                        tables, which later runs read instead of the server; requires pyarrow""", default=None)
     parser.add_argument("-v", "--verbose", help="Increase output verbosity", action="store_true")
     parser.add_argument("--log_directory", help="Where to save the log file", default="../log/")
     parser.add_argument("--gdb", help="GeoDataBase Path", default=None)
+    parser.add_argument("--gdb_arrow", help="[GDB] Read features in Arrow batches (GDAL 3.6 and up, with pyarrow)",
+                        action="store_true")
     args = parser.parse_args()
 
     set_logging(args, timestamp)
@@ -9,6 +9,7 @@ from data.readers.rdf import multiread
 from data.writers.rdf import write
 from rdf.metadata import update_metadata
 from rdf.namespace_wrapper import default_namespace_of
+from rdf.stores import STORES, store_path_of
 from ui.progress_indicator import ProgressIndicator
 
 def run(args, timestamp):
@@ -27,7 +28,9 @@ def run(args, timestamp):
     print("Merging graphs...")
     pi = ProgressIndicator()
     pi.start()
-    graph = multiread(args.graphs)
+    graph = multiread(args.graphs,
+                      store=args.store,
+                      store_path=store_path_of(args.store_directory, output_path, args.store))
     update_metadata(graph, default_namespace_of(graph)[0], timestamp)
     pi.stop()
 
@@ -35,6 +38,8 @@ def run(args, timestamp):
     print("Writing graph to disk...")
     write(graph, output_path, args.serialization_format)
 
+    graph.close()
+
 def _check_paths(graphs):
     for graph in graphs:
         if not is_readable(graph):
@@ -70,6 +75,9 @@ if __name__ == "__main__":
                         choices=["n3", "nquads", "ntriples", "pretty-xml", "trig", "trix", "turtle", "xml"], default='turtle')
     parser.add_argument("-o", "--output", help="Output file", nargs='?', default=None)
     parser.add_argument("-g", "--graphs", help="Input RDF graphs", nargs='+')
+    parser.add_argument("--store", help="Graph store backend; persistent stores are reused on later runs",
+                        choices=STORES, default='default')
+    parser.add_argument("--store_directory", help="Where to keep persistent graph stores", default="./")
     parser.add_argument("-v", "--verbose", help="Increase output verbosity", action="store_true")
     parser.add_argument("--log_directory", help="Where to save the log file", default="../log/")
     args = parser.parse_args()
@@ -13,6 +13,7 @@ from data.writers.rdf import write
 from enrichers.objecttypelibrary import enrich
 from interfaces.schemas.objecttypelibrary import SchemaOTL
 from rdf.namespace_wrapper import default_namespace_of
+from rdf.stores import STORES, store_path_of
 from ui.progress_indicator import ProgressIndicator
 
 
@@ -26,7 +27,7 @@ def run(args, timestamp):
 
     print("Importing referenced graph...")
     pi.start()
-    params = import_graph(args.graph, mapping)
+    params = import_graph(args.graph, mapping, args.store, args.store_directory)
     pi.stop()
 
     print("Generating enrichments...")
@@ -47,11 +48,13 @@ def run(args, timestamp):
     print("Writing graph to disk...")
     write(graph, output_path, args.serialization_format)
 
-def import_graph(filename, schema):
+    params['graph'].close()
+
+def import_graph(filename, schema, store='default', store_directory="./"):
     if not is_readable(filename):
         raise Exception("File missing or wrong permissions: {}".format(filename))
 
-    graph = read(filename)
+    graph = read(filename, store=store, store_path=store_path_of(store_directory, filename, store))
     namespace, gtype = default_namespace_of(graph)
     database = _determine_database(namespace)
 
@@ -107,6 +110,9 @@ if __name__ == "__main__":
     parser.add_argument("-m", "--mapping", help="""Mapping table (JSON) used to link to OTL""")
     parser.add_argument("-o", "--output", help="Output file", default=None)
     parser.add_argument("--graph", help="RDF graph")
+    parser.add_argument("--store", help="Graph store backend; persistent stores are reused on later runs",
+                        choices=STORES, default='default')
+    parser.add_argument("--store_directory", help="Where to keep persistent graph stores", default="./")
     parser.add_argument("-v", "--verbose", help="Increase output verbosity", action="store_true")
     parser.add_argument("--log_directory", help="Where to save the log file", default="../log/")
     args = parser.parse_args()
@@ -77,7 +77,7 @@ def _run_sql(args, datatypes_map, uml):
     database = server.server.database
 
     # generate schema
-    schema = generate_mssql(server, datatypes_map, uml)
+    schema = generate_mssql(server, datatypes_map, uml, args.catalog)
 
     # close connection
     server.disconnect()
@@ -123,6 +123,7 @@ if __name__ == "__main__":
     parser.add_argument("--interactive", help="Enable interactive mode", default="store_true")
     parser.add_argument("--gdb", help="GeoDataBase Path", default=None)
     parser.add_argument("--uml", help="Optional UML diagram", default=None)
+    parser.add_argument("--catalog", help="Optional cache file (JSON) of the database catalog", default=None)
     args = parser.parse_args()
 
     set_logging(args, timestamp)
@@ -14,6 +14,7 @@ from interlinkers.abox.generic import link as abox_link
 from interlinkers.tbox.generic import link as tbox_link
 from interfaces.schemas.crossreferences import SchemaXR
 from rdf.namespace_wrapper import default_namespace_of
+from rdf.stores import STORES, store_path_of
 from ui.progress_indicator import ProgressIndicator
 
 
@@ -30,7 +31,9 @@ def run(args, timestamp):
     pi.start()
     params = import_graphs(args.source_graph,\
                            args.target_graph,\
-                           {db for pair in database_pairs for db in pair})
+                           {db for pair in database_pairs for db in pair},
+                           args.store,
+                           args.store_directory)
     pi.stop()
 
     # generate crossreferences
@@ -59,13 +62,16 @@ def run(args, timestamp):
     print("Writing graph to disk...")
     write(graph, output_path, args.serialization_format)
 
-def import_graphs(source, target, schema):
+    params['source_graph'].close()
+    params['target_graph'].close()
+
+def import_graphs(source, target, schema, store='default', store_directory="./"):
     for filename in [source, target]:
         if not is_readable(filename):
             raise Exception("File missing or wrong permissions: {}".format(filename))
 
-    source_graph = read(source)
-    target_graph = read(target)
+    source_graph = read(source, store=store, store_path=store_path_of(store_directory, source, store))
+    target_graph = read(target, store=store, store_path=store_path_of(store_directory, target, store))
 
     source_namespace, source_type = default_namespace_of(source_graph)
     target_namespace, target_type = default_namespace_of(target_graph)
@@ -148,6 +154,9 @@ if __name__ == "__main__":
     parser.add_argument("--source_graph", help="Source RDF graph")
     parser.add_argument("--target_graph", help="Target RDF graph")
     parser.add_argument("--include_backlinks", help="Include links from target to source", action="store_true")
+    parser.add_argument("--store", help="Graph store backend; persistent stores are reused on later runs",
+                        choices=STORES, default='default')
+    parser.add_argument("--store_directory", help="Where to keep persistent graph stores", default="./")
     parser.add_argument("-v", "--verbose", help="Increase output verbosity", action="store_true")
     parser.add_argument("--log_directory", help="Where to save the log file", default="../log/")
     args = parser.parse_args()
@@ -10,7 +10,10 @@ from rdf.operators import add_property, add_type
 
 logger = getLogger(__name__)
 
-def add_metadata(g, base_namespace, timestamp, database, is_ontology=False):
+def add_metadata(g, base_namespace, timestamp, database, is_ontology=False, extra_triples=0):
+    """ Add meta data about the dataset or ontology; extra_triples counts
+        those triples which belong to it but are not in g
+    """
     logger.info("Adding meta-data")
 
     # update namespaces
@@ -65,7 +68,7 @@ def add_metadata(g, base_namespace, timestamp, database, is_ontology=False):
     add_property(g, base, description_en, URIRef(ns['dcterms'] + 'description'))
 
     # number of triples 
-    ntriples = Literal(len(g)+1, datatype=URIRef(ns['xsd'] + 'nonNegativeInteger'))
+    ntriples = Literal(len(g)+1+extra_triples, datatype=URIRef(ns['xsd'] + 'nonNegativeInteger'))
     add_property(g, base, ntriples, URIRef(ns['void'] + 'triples'))
 
 def update_metadata(g, base_namespace, timestamp):
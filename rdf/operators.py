@@ -1,7 +1,8 @@
 #!/usr/bin/python3
 
 from logging import getLogger
-from hashlib import sha1
+from functools import lru_cache
+from hashlib import sha1, blake2b
 from rdflib.namespace import RDF, RDFS
 from rdflib.term import Literal
 
@@ -9,14 +10,61 @@ from rdflib.term import Literal
 logger = getLogger(__name__)
 
 DEFAULT_LABEL_LANG="nl"
+HASH_CACHE_SIZE = 2**18
+HASH_DIGESTS = {'sha1': sha1,
+                'blake2b': lambda data: blake2b(data, digest_size=20)}  # faster, but mints other URIs
 
-def gen_hash(node, salt='', pre='r'):
-    if type(salt) is not str:
+def gen_hash(node, salt='', pre='r', cache=True):
+    """ Mint a hash of salt followed by node
+
+    Mints are cached per (node, salt), as nodes recur across records;
+    set cache to False for one-off keys, such as geometries, which would
+    only fill the cache.
+    """
+    if not cache:
+        return _hash(str(salt) + str(node), pre, _hash_function)
+
+    # only cache values of which equality implies equal text
+    if type(node) not in (str, int):
+        node = str(node)
+    if type(salt) not in (str, int):
         salt = str(salt)
 
-    salt += str(node)
+    return _cached_hash(node, salt, pre)
+
+def _hash(key, pre, digest=sha1):
+    return pre + digest(key.encode()).hexdigest()
+
+def _mint(node, salt, pre, digest=sha1):
+    return _hash(str(salt) + str(node), pre, digest)
+
+_hash_function = sha1
+_cached_hash = lru_cache(maxsize=HASH_CACHE_SIZE, typed=True)(_mint)
+
+def set_hash_options(cache_size=HASH_CACHE_SIZE, digest='sha1'):
+    """ Resize the hash cache and select the digest used by gen_hash
+
+    Only sha1 mints URIs compatible with earlier output.
+    """
+    global _cached_hash, _hash_function
+    if digest not in HASH_DIGESTS.keys():
+        raise ValueError("Unsupported digest: {}".format(digest))
+    logger.info("Minting URIs with {} (cache size {})".format(digest, cache_size))
+
+    hash_function = HASH_DIGESTS[digest]
+    _hash_function = hash_function
+    _cached_hash = lru_cache(maxsize=cache_size, typed=True)(lambda node, salt, pre: _mint(node, salt, pre,
+                                                                                          hash_function))
+
+def hash_cache_info():
+    info = _cached_hash.cache_info()
+    requests = info.hits + info.misses
 
-    return pre + sha1(salt.encode()).hexdigest()
+    return {'hits': info.hits,
+            'misses': info.misses,
+            'size': info.currsize,
+            'maxsize': info.maxsize,
+            'hit_rate': info.hits / requests if requests > 0 else 0.0}
 
 def add_property(g, parent, child, relation):
     g.add((parent, relation, child))
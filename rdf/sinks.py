@@ -0,0 +1,179 @@
+#!/usr/bin/python3
+
+from logging import getLogger
+
+from rdflib.graph import Graph
+from rdflib.namespace import NamespaceManager
+from rdflib.term import URIRef
+from rdflib.plugins.serializers.nt import _nt_row
+from rdflib.plugins.serializers.nquads import _nq_row
+
+
+logger = getLogger(__name__)
+
+FLUSH_SIZE = 100000
+BUFFER_SIZE = 100000
+
+class Sink:
+    """ Triple Sink Class
+
+    Minimal stand-in for an rdflib Graph which translators can write
+    triples into: it accepts add(), addN(), and +=, keeps a namespace
+    manager, and counts the triples it receives. Unlike a Graph, a sink
+    does not remove duplicate triples.
+    """
+
+    def __init__(self, identifier=None):
+        self.identifier = URIRef(identifier) if identifier is not None else None
+        self.namespace_manager = NamespaceManager(Graph())
+        self._ntriples = 0
+
+    def add(self, triple):
+        self._ntriples += 1
+        self._emit(triple)
+
+    def addN(self, quads):
+        for s, p, o, _ in quads:
+            self.add((s, p, o))
+
+    def __iadd__(self, other):
+        for triple in other:
+            self.add(triple)
+
+        return self
+
+    def __len__(self):
+        return self._ntriples
+
+    def namespaces(self):
+        return self.namespace_manager.namespaces()
+
+    def close(self):
+        pass
+
+    def _emit(self, triple):
+        pass
+
+class CountingSink(Sink):
+    """ Counts triples and discards them; for benchmarking
+    """
+
+    def add_lines(self, lines):
+        self._ntriples += len(lines)
+
+class FileSink(Sink):
+    """ Writes N-Triples, or N-Quads if sformat is 'nquads', to file
+
+    Lines are buffered and flushed every flush_size triples. If append is
+    set, lines are added to an existing file.
+    """
+
+    def __init__(self, filename, sformat='ntriples', identifier=None, flush_size=FLUSH_SIZE, append=False):
+        if sformat not in ['ntriples', 'nquads']:
+            raise ValueError("Unsupported streaming format: {}".format(sformat))
+        if sformat == 'nquads' and identifier is None:
+            raise ValueError("N-Quads require a graph identifier")
+
+        super().__init__(identifier)
+
+        logger.info("Streaming RDF ({}) to {}".format(sformat, filename))
+        self.filename = filename
+        self._quads = sformat == 'nquads'
+        self._flush_size = flush_size
+        self._buffer = []
+        self._file = open(filename, 'a' if append else 'w', encoding='utf-8')
+
+    def flush(self):
+        self._file.write("".join(self._buffer))
+        self._buffer = []
+
+    def add_lines(self, lines):
+        """ Write N-Triples lines, one triple each, as they are
+        """
+        self._ntriples += len(lines)
+        if self._quads:
+            context = " {} .\n".format(self.identifier.n3())
+            lines = [line[:-3] + context for line in lines]  # strip " .\n"
+
+        self._buffer.extend(lines)
+        if len(self._buffer) >= self._flush_size:
+            self.flush()
+
+    def close(self):
+        self.flush()
+        self._file.close()
+        logger.info("Wrote {} triples to {}".format(len(self), self.filename))
+
+    def _emit(self, triple):
+        if self._quads:
+            self._buffer.append(_nq_row(triple, self.identifier))
+        else:
+            self._buffer.append(_nt_row(triple))
+
+        if len(self._buffer) >= self._flush_size:
+            self.flush()
+
+class TripleBuffer(Sink):
+    """ Collects triples to add them to a graph in bulk
+
+    Triples are passed on with a single addN call, which is cheaper than
+    building an intermediate graph and merging it. If graph is given,
+    the buffer is flushed into it every size triples; otherwise triples
+    are kept until flush() is called with a graph.
+    """
+
+    def __init__(self, graph=None, size=BUFFER_SIZE):
+        super().__init__()
+
+        self.graph = graph
+        if graph is not None:
+            self.namespace_manager = graph.namespace_manager
+        self._size = size
+        self._triples = []
+
+    def flush(self, graph=None):
+        if graph is None:
+            graph = self.graph
+
+        graph.addN((s, p, o, graph) for s, p, o in self._triples)
+        self._triples = []
+
+    def close(self):
+        if self.graph is not None:
+            self.flush()
+
+    def __iter__(self):
+        return iter(self._triples)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _emit(self, triple):
+        self._triples.append(triple)
+
+        if self.graph is not None and len(self._triples) >= self._size:
+            self.flush()
+
+class LineBuffer(Sink):
+    """ Collects N-Triples lines to pass them on to a sink which takes
+        lines in bulk
+    """
+
+    def __init__(self):
+        super().__init__()
+
+        self._lines = []
+
+    def add_lines(self, lines):
+        self._ntriples += len(lines)
+        self._lines.extend(lines)
+
+    def flush(self, sink):
+        sink.add_lines(self._lines)
+        self._lines = []
+
+    def _emit(self, triple):
+        self._lines.append(_nt_row(triple))
@@ -0,0 +1,92 @@
+#!/usr/bin/python3
+
+import json
+from hashlib import sha1
+from importlib import import_module
+from logging import getLogger
+from os import remove
+from os.path import abspath, basename, exists, getmtime, getsize, isdir, join
+from shutil import rmtree
+
+from rdflib.graph import Graph
+
+
+logger = getLogger(__name__)
+
+STORES = ["default", "Sleepycat"]  # in-memory, and Berkeley DB on disk
+STORE_REQUIREMENTS = {"Sleepycat": "bsddb3"}
+
+def open_graph(identifier=None, store='default', path=None, fresh=False):
+    """ Create a graph on the requested store
+
+    Persistent stores are opened at path, and created if needed; an
+    existing store keeps its triples, unless fresh is set, in which case
+    it is removed first.
+    """
+    if store != 'default':
+        if path is None:
+            raise ValueError("Persistent store requires a path")
+
+        _require(store)
+        if fresh:
+            remove_store(path)
+
+    graph = Graph(store=store, identifier=identifier) if identifier is not None\
+            else Graph(store=store)
+
+    if store != 'default':
+        logger.info("Opening {} store at {}".format(store, path))
+        graph.open(path, create=True)
+
+    return graph
+
+def remove_store(path):
+    """ Remove a persistent store and the record of its sources
+    """
+    for store_path in [path, _sources_path(path)]:
+        if isdir(store_path):
+            rmtree(store_path)
+        elif exists(store_path):
+            remove(store_path)
+
+def is_persistent(store):
+    return store != 'default'
+
+def store_path_of(directory, filename, store):
+    # tell apart equally named files in different directories
+    digest = sha1(abspath(filename).encode()).hexdigest()[:8]
+
+    return join(directory, "{}.{}.{}".format(basename(filename), digest, store.lower()))
+
+def source_stamps(paths):
+    """ Return the absolute path, modification time, and size of each
+        source file
+    """
+    return [[abspath(path), getmtime(path), getsize(path)] for path in paths]
+
+def stored_sources(path):
+    """ Return the source stamps a persistent store was filled from, or
+        None if unknown
+    """
+    if not exists(_sources_path(path)):
+        return None
+
+    with open(_sources_path(path), 'r') as f:
+        return json.load(f)
+
+def save_sources(path, stamps):
+    with open(_sources_path(path), 'w') as f:
+        json.dump(stamps, f)
+
+def _sources_path(path):
+    return path + ".sources.json"
+
+def _require(store):
+    module = STORE_REQUIREMENTS.get(store)
+    if module is None:
+        return
+
+    try:
+        import_module(module)
+    except ImportError:
+        raise ImportError("The {} store requires the {} package".format(store, module))
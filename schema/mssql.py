@@ -5,6 +5,7 @@ from statistics import mean, pstdev
 
 from distance import levenshtein
 
+from interfaces.catalog import load as load_catalog
 from schema.auxiliarly import attributename_from_table,\
                               classname_from_table,\
                               relationname_from_table
@@ -14,10 +15,13 @@ logger = getLogger(__name__)
 
 EXCL_ATTRS = ["TimeStamp"]
 
-def generate(server, datatypes_map, uml=None):
+def generate(server, datatypes_map, uml=None, catalog_path=None):
     # selected database
     database = server.server.database
 
+    # load columns and keys of all tables at once
+    catalog = load_catalog(server, catalog_path)
+
     # retrieve table list
     tables = server.list_tables(database)
     logger.info("Retrieved {} tables".format(len(tables)))
@@ -45,11 +49,11 @@ def generate(server, datatypes_map, uml=None):
     schema['schema'] = {}
     for table in tables:
         logger.info("Processing table {}".format(table))
-        schema['schema'][table] = _table_to_schema(server, tables, table, datatypes_map, uml)
+        schema['schema'][table] = _table_to_schema(server, catalog, tables, table, datatypes_map, uml)
 
     return schema
 
-def _table_to_schema(server, tables, table, datatypes_map, uml):
+def _table_to_schema(server, catalog, tables, table, datatypes_map, uml):
     subschema = {}
 
     subschema['link_table'] = True if table.lower().startswith('ktbl') else False
@@ -57,8 +61,8 @@ def _table_to_schema(server, tables, table, datatypes_map, uml):
     subschema['subClassOf'] = None
     subschema['include'] = True
 
-    columns = server.list_columns(table)
-    primary_key = server.primary_key(table)
+    columns = catalog.list_columns(table)
+    primary_key = catalog.primary_key(table)
     if primary_key is not None:
         subschema['identifier'] = primary_key['COLUMN_NAME']
     elif 'id' in [column['column_name'] for column in columns]:
@@ -67,8 +71,8 @@ def _table_to_schema(server, tables, table, datatypes_map, uml):
         subschema['identifier'] = None
 
     if uml is None:
-        relations = server.foreign_keys(table)
-        attributes = server.list_columns(table, include_keys=False)
+        relations = catalog.foreign_keys(table)
+        attributes = catalog.list_columns(table, include_keys=False)
     else:
         relations = uml.relations_of(table)
         attributes = uml.attributes_of(table)
@@ -0,0 +1,39 @@
+#!/usr/bin/python3
+
+from os.path import abspath, dirname
+from sys import path
+
+path.insert(0, dirname(dirname(abspath(__file__))))
+
+from rdflib.graph import Graph
+from rdflib.namespace import DCTERMS, VOID
+from rdflib.term import URIRef
+
+from rdf.metadata import add_metadata, update_metadata
+
+
+BASE = "http://www.rijkswaterstaat.nl/linked_data/test/"
+
+def _graph():
+    g = Graph()
+    g.namespace_manager.bind("rws.test", BASE)
+    g.add((URIRef(BASE + "a"), URIRef(BASE + "p"), URIRef(BASE + "b")))
+
+    return g
+
+def test_add_metadata_counts_extra_triples():
+    g = _graph()
+    add_metadata(g, "rws.test", 0, "test", extra_triples=10)
+
+    assert int(g.value(URIRef(BASE), VOID.triples)) == len(g) + 10
+
+def test_update_metadata_replaces_count_and_modified():
+    g = _graph()
+    add_metadata(g, "rws.test", 0, "test")
+    g.add((URIRef(BASE + "c"), URIRef(BASE + "p"), URIRef(BASE + "d")))
+
+    update_metadata(g, URIRef(BASE), 3600)
+
+    assert len(list(g.objects(URIRef(BASE), VOID.triples))) == 1
+    assert len(list(g.objects(URIRef(BASE), DCTERMS.modified))) == 1
+    assert int(g.value(URIRef(BASE), VOID.triples)) == len(g)
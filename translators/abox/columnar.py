@@ -0,0 +1,117 @@
+#!/usr/bin/python3
+
+from logging import getLogger
+
+from rdflib.namespace import RDF, RDFS, XSD
+from rdflib.plugins.serializers.nt import _quoteLiteral, _quote_encode
+from rdflib.term import Literal
+
+from rdf.operators import gen_hash, DEFAULT_LABEL_LANG
+from translators.abox import pipeline
+from translators.abox.plan import to_literal
+
+
+BATCH_SIZE = 10000
+
+_enabled = False
+_batch_size = BATCH_SIZE
+
+# lexical forms of values which need no Literal to be built,
+# per (type, datatype)
+_LEXICAL_FORMS = {(str, XSD.string): str.strip,
+                  (int, XSD.integer): str}
+
+_TYPE = (RDF.uri + 'type').n3()
+_LABEL = (RDFS.uri + 'label').n3()
+
+logger = getLogger(__name__)
+
+def set_columnar_options(enabled=False, batch_size=BATCH_SIZE):
+    """ Translate records in column batches straight to N-Triples lines
+        if the target takes these
+    """
+    global _enabled, _batch_size
+    if batch_size <= 0:
+        raise ValueError("Invalid batch size: {}".format(batch_size))
+    logger.info("Columnar translation {} (batch size {})".format("enabled" if enabled else "disabled",
+                                                                   batch_size))
+
+    _enabled = enabled
+    _batch_size = batch_size
+
+def enabled():
+    return _enabled
+
+def takes_lines(g):
+    return hasattr(g, 'add_lines')
+
+def batched(records):
+    return pipeline.batched(records, _batch_size)
+
+def batch_to_lines(batch, plan, references):
+    """ Translate a batch of records to N-Triples lines
+
+    Every column is converted as a whole into N-Triples terms, without
+    building rdflib terms for nodes nor for literals of which the lexical
+    form is known. The lines are those the row-wise translation writes,
+    in the same order.
+    """
+    subjects = [_node(plan.namespace, plan.classname, rec[plan.identifier]) for rec in batch]
+    heads = [subject + " " for subject in subjects]
+
+    type_tail = " {} .\n".format(plan.class_node.n3())
+    label_lang = Literal("", lang=DEFAULT_LABEL_LANG).language
+    columns = [[head + _TYPE + type_tail for head in heads],
+               [head + _LABEL + " " + _quote_encode("{} {}".format(plan.classname, rec[plan.identifier]))
+                + "@" + label_lang + " .\n" for head, rec in zip(heads, batch)]]
+
+    for column, attr_link, datatype in plan.attributes:
+        predicate = attr_link.n3() + " "
+        objects = _literals([rec.get(column) for rec in batch], datatype)
+        columns.append([None if o is None else head + predicate + o + " .\n"
+                        for head, o in zip(heads, objects)])
+
+    for column, rel_link, inverse_rel_link, targetclassname, targettable in plan.relations:
+        values = [rec.get(column) for rec in batch]
+        targets = _nodes(plan.namespace, targetclassname, values)
+
+        predicate = rel_link.n3() + " "
+        inverse_predicate = " " + inverse_rel_link.n3() + " "
+        columns.append([None if target is None else head + predicate + target + " .\n"
+                        for head, target in zip(heads, targets)])
+        columns.append([None if target is None else target + inverse_predicate + subject + " .\n"
+                        for subject, target in zip(subjects, targets)])
+
+        # store referenced nodes for further processing
+        found = {v for v in values if v is not None}
+        if len(found) > 0:
+            references.add_references(targettable, found)
+
+    return [line for row in zip(*columns) for line in row if line is not None]
+
+def _node(namespace, classname, value):
+    return "<" + namespace + gen_hash(classname, value) + ">"
+
+def _nodes(namespace, classname, values):
+    return [None if v is None else _node(namespace, classname, v) for v in values]
+
+def _literals(values, datatype):
+    """ Return the terms of values as literals of datatype, or None where
+        there is no value or it cannot be decoded
+    """
+    suffix = "^^<{}>".format(datatype)
+    terms = []
+    for v in values:
+        if v is None:
+            terms.append(None)
+            continue
+
+        lexical = _LEXICAL_FORMS.get((type(v), datatype))
+        if lexical is not None:
+            terms.append(_quote_encode(lexical(v)) + suffix)
+            continue
+
+        literal = to_literal(v, datatype)
+        terms.append(None if literal is None else _quoteLiteral(literal))
+
+    return terms
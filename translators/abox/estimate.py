@@ -0,0 +1,148 @@
+#!/usr/bin/python3
+
+import json
+from logging import getLogger
+
+from rdflib.plugins.serializers.nt import _nt_row
+
+from rdf.sinks import TripleBuffer
+from translators.abox import generic_sql
+from translators.references.reference_manager import ReferenceManager
+
+
+SAMPLE_SIZE = 1000
+SUMMARY_SIZE = 10
+
+logger = getLogger(__name__)
+
+def estimate(server, mapper, root_table, roots, secondary_tables, sample_size=SAMPLE_SIZE):
+    """ Estimate the size of a translation without running it
+
+    Starting from the number of root records, the reference traversal is
+    simulated per table using the row counts kept by the server and the
+    number of distinct references per row found in a sample of every
+    table. Sampled records are converted in memory to measure triples
+    and bytes per row. Tables are assumed to be referenced uniformly.
+    """
+    generic_sql._override_namespaces(mapper.database_name())
+    counts = server.row_counts()
+    profiles = {}
+
+    def profile(table):
+        if table not in profiles.keys():
+            profiles[table] = _profile(server, mapper, table, sample_size)
+        return profiles[table]
+
+    visited = {}
+    stages = []
+
+    # start with the root table
+    iterations = _traverse({root_table: roots}, visited, counts, profile)
+    stages.append({'stage': root_table, 'iterations': iterations})
+
+    # followed by the tables which refer to it
+    for table, _ in secondary_tables:
+        share = visited.get(root_table, 0) / counts[root_table] if counts.get(root_table, 0) > 0 else 0.0
+        rows = counts.get(table, 0) * share - visited.get(table, 0)
+        if rows < 1:
+            continue
+
+        iterations = _traverse({table: rows}, visited, counts, profile)
+        stages.append({'stage': table, 'iterations': iterations})
+
+    tables = []
+    for table, rows in visited.items():
+        table_profile = profile(table)
+        tables.append({'table': table,
+                       'rows': int(rows),
+                       'table_rows': counts.get(table, 0),
+                       'triples': int(rows * table_profile['triples_per_row']),
+                       'bytes': int(rows * table_profile['bytes_per_row'])})
+    tables.sort(key=lambda table: table['triples'], reverse=True)
+
+    return {'roots': roots,
+            'depth': max([stage['iterations'] for stage in stages], default=0),
+            'stages': stages,
+            'rows': sum(table['rows'] for table in tables),
+            'triples': sum(table['triples'] for table in tables),
+            'bytes': sum(table['bytes'] for table in tables),
+            'tables': tables}
+
+def _traverse(frontier, visited, counts, profile):
+    """ Simulate a breadth-first traversal from frontier, updating the
+        expected number of visited rows per table; returns its depth
+    """
+    i = 0
+    while len(frontier) > 0 and i < generic_sql.MAX_ITERATIONS:
+        referenced = {}
+        for table, rows in frontier.items():
+            visited[table] = visited.get(table, 0) + rows
+
+            for targettable, references_per_row in profile(table)['relations']:
+                referenced[targettable] = referenced.get(targettable, 0) + rows * references_per_row
+
+        # only rows not visited before continue the traversal
+        frontier = {}
+        for table, rows in referenced.items():
+            total = counts.get(table, 0)
+            if total <= 0:
+                continue
+
+            rows = min(rows, total) * (1 - min(visited.get(table, 0), total) / total)
+            if rows >= 1:
+                frontier[table] = rows
+
+        i += 1
+
+    return i
+
+def _profile(server, mapper, table, sample_size):
+    """ Measure triples, bytes, and distinct references per row of table
+        in a sample of its records
+    """
+    profile = {'triples_per_row': 0.0, 'bytes_per_row': 0.0, 'relations': []}
+    if table not in mapper.schema['schema'].keys():
+        return profile
+
+    buffer = TripleBuffer()
+    generic_sql._update_namespaces(buffer.namespace_manager)
+    plan = generic_sql._table_to_plan(buffer, table, mapper)
+    if plan.identifier is None:
+        return profile
+
+    records = server.sample(table, sample_size)
+    logger.info("Sampled {} records of {}".format(len(records), table))
+    if len(records) <= 0:
+        return profile
+
+    ntriples = 0
+    found = ReferenceManager()
+    for rec in records:
+        ntriples += generic_sql._record_to_graph(buffer, found, rec, plan)
+
+    profile['triples_per_row'] = ntriples / len(records)
+    profile['bytes_per_row'] = sum(len(_nt_row(triple).encode()) for triple in buffer) / len(records)
+    for column, _, _, _, targettable in plan.relations:
+        values = {rec.get(column) for rec in records} - {None}
+        profile['relations'].append((targettable, len(values) / len(records)))
+
+    return profile
+
+def write_estimate(report, path):
+    logger.info("Writing estimate to {}".format(path))
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=2)
+
+def summary(report, n=SUMMARY_SIZE):
+    """ Return a few lines on the tables which add most triples
+    """
+    lines = ["{:<40} {:>12} {:>12} {:>14}".format("table", "rows", "triples", "size (MB)")]
+    for table in report['tables'][:n]:
+        lines.append("{:<40} {:>12} {:>12} {:>14.1f}".format(table['table'][:40],
+                                                           table['rows'],
+                                                           table['triples'],
+                                                           table['bytes'] / 2**20))
+    lines.append("{} roots, depth {}: about {} rows, {} triples, and {:.1f} MB of N-Triples".format(
+        report['roots'], report['depth'], report['rows'], report['triples'], report['bytes'] / 2**20))
+
+    return "\n".join(lines)
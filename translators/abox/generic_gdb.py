@@ -6,6 +6,9 @@ from rdflib.graph import Graph
 from rdflib.namespace import Namespace
 
 from rdf.operators import gen_hash, add_property, add_label, add_type
+from rdf.sinks import TripleBuffer
+from translators.abox import metrics, pipeline
+from translators.abox.plan import TranslationPlan, to_literal
 
 
 DEFAULT_NAMESPACE = "http://www.rijkswaterstaat.nl/linked_data/"
@@ -19,8 +22,11 @@ EXCL_VALUES = [-111*i for i in range(1,10)]
 EXCL_VALUES.extend([str(i) for i in EXCL_VALUES])
 EXCL_VALUES.extend(['Niet van toepassing', 'Geen informatie'])
 
-def translate(gdb, mapper, area, time):
+def translate(gdb, mapper, area, time, sink=None):
     """ Translate
+
+    Triples are written into sink if one is given, and into a new graph
+    otherwise.
     """
     # selected database
     database = mapper.database_name()
@@ -33,7 +39,7 @@ def translate(gdb, mapper, area, time):
     DEFAULT_SCHEMA_PREFIX = "rws.schema.{}".format(database)
 
     # init graph instance
-    g = Graph(identifier=gen_hash(database.upper(), time))
+    g = Graph(identifier=gen_hash(database.upper(), time)) if sink is None else sink
 
     # update namespaces
     _update_namespaces(g.namespace_manager)
@@ -43,25 +49,51 @@ def translate(gdb, mapper, area, time):
 
     return g
 
-def _layer_to_class(g, mapping):
+def _layer_to_plan(g, layer_name, mapper):
     ns = dict(g.namespace_manager.namespaces())
+    mapping = mapper.schema['schema'][layer_name]
+
+    plan = TranslationPlan(mapping,
+                           mapper.attributes(layer_name),
+                           [],
+                           ns[DEFAULT_PREFIX],
+                           ns[DEFAULT_SCHEMA_PREFIX],
+                           name=layer_name)
+
+    # geometry terms
+    plan.geometry_link = URIRef(ns['geo'] + 'hasGeometry')
+    plan.wkt_link = URIRef(ns['geo'] + 'asWKT')
+    plan.wkt_datatype = URIRef(ns['geo'] + 'wktLiteral')
+    plan.sf_namespace = ns['sf']
 
-    return URIRef(ns[DEFAULT_SCHEMA_PREFIX] + mapping['classname'])
+    return plan
 
 def _layer_to_graph(g, gdb, layer_name, area, mapper):
-    ns = dict(g.namespace_manager.namespaces())
     logger.info("Processing layer {}".format(layer_name))
-    mapping = mapper.schema['schema'][layer_name]
+    plan = _layer_to_plan(g, layer_name, mapper)
 
-    # define class
-    class_node = _layer_to_class(g, mapping)
+    if plan.identifier is None:
+        return
 
-    # translate features
-    attributes = list(mapper.attributes(layer_name))
+    with metrics.current().table(layer_name) as measurement:
+        # translate features
+        # let the driver skip features outside area and unmapped attributes
+        fields = [column for column, _, _ in plan.attributes]
+        features = measurement.fetching(gdb.features_of(layer_name, area, fields), size=None)
+        features = measurement.keeping(_decode_features(gdb, features, area))
 
-    for feat in gdb.features_of(layer_name):
-        if mapping['identifier'] is None:
-            continue
+        if pipeline.enabled():
+            measurement.triples = _features_to_graph_pipelined(g, features, plan)
+            return
+
+        for fid, values, geom_wkt, gtype in features:
+            measurement.triples += _feature_to_graph(g, values, fid, geom_wkt, gtype, plan)
+
+def _decode_features(gdb, features, area):
+    """ Yield the ID, values, and geometry of features of which the
+        centroid lies within area
+    """
+    for feat in features:
         fid = feat.GetFID()
         if fid is None or fid <= 0:
             continue
@@ -75,39 +107,63 @@ def _layer_to_graph(g, gdb, layer_name, area, mapper):
         if geom_wkt is None:
             continue
 
-        # node for this feature
-        feat_node = URIRef(ns[DEFAULT_PREFIX] + gen_hash(layer_name+mapping['classname'], fid))
-        add_type(g, feat_node, class_node)
-        add_label(g, feat_node, "{} {} ({})".format(mapping['classname'], fid, gtype))
-
-        for k,v in feat.items().items():
-            if v is None or v in EXCL_VALUES:
-                continue
-            if k in attributes:
-                # create node
-                attr = mapping['attributes'][k]
-                try:
-                    if type(v) is str:
-                        v = v.strip()
-                    attr_node = Literal(v, datatype=URIRef(attr['datatype']))
-                except UnicodeDecodeError:
-                    if type(v) is bytes:
-                        v = v.decode('utf-8', 'ignore')
-                        attr_node = Literal(v, datatype=URIRef(attr['datatype']))
-
-                # link to node
-                attr_link = URIRef(ns[DEFAULT_SCHEMA_PREFIX] + "{}_{}".format(mapping['classname'].lower(), attr['property']))
-                add_property(g, feat_node, attr_node, attr_link)
-
-        # add geometry node
-        geom_node = URIRef(ns[DEFAULT_PREFIX] + gen_hash(geom_wkt, gtype))
-        add_type(g, geom_node, URIRef(ns['sf'] + _geo_type(gtype)))
-        add_label(g, geom_node, "{} Geometry".format(_geo_type(gtype)))
-        add_property(g, feat_node, geom_node, URIRef(ns['geo'] + 'hasGeometry'))
-
-        # include WKT
-        geom_wkt_node = Literal(geom_wkt, datatype=URIRef(ns['geo'] + 'wktLiteral'))
-        add_property(g, geom_node, geom_wkt_node, URIRef(ns['geo'] + 'asWKT'))
+        yield (fid, feat.items(), geom_wkt, gtype)
+
+def _features_to_graph_pipelined(g, features, plan):
+    """ Translate batches of features while the next are being decoded;
+        returns the number of triples
+    """
+    def translate_batch(batch):
+        buffer = TripleBuffer()
+        for fid, values, geom_wkt, gtype in batch:
+            _feature_to_graph(buffer, values, fid, geom_wkt, gtype, plan)
+
+        return buffer
+
+    ntriples = 0
+    def write(buffer):
+        nonlocal ntriples
+        ntriples += len(buffer)
+        buffer.flush(g)
+
+    pipeline.run(pipeline.batched(features), translate_batch, write)
+
+    return ntriples
+
+def _feature_to_graph(g, values, fid, geom_wkt, gtype, plan):
+    """ Add the triples of a feature to g; returns their number
+    """
+    # node for this feature
+    feat_node = URIRef(plan.namespace + gen_hash(plan.hash_prefix, fid))
+    add_type(g, feat_node, plan.class_node)
+    add_label(g, feat_node, "{} {} ({})".format(plan.classname, fid, gtype))
+    ntriples = 6  # including those of the geometry
+
+    for column, attr_link, datatype in plan.attributes:
+        v = values.get(column)
+        if v is None or v in EXCL_VALUES:
+            continue
+
+        # create node
+        attr_node = to_literal(v, datatype)
+        if attr_node is None:
+            continue
+
+        # link to node
+        add_property(g, feat_node, attr_node, attr_link)
+        ntriples += 1
+
+    # add geometry node
+    geom_node = URIRef(plan.namespace + gen_hash(geom_wkt, gtype, cache=False))  # rarely recurs
+    add_type(g, geom_node, URIRef(plan.sf_namespace + _geo_type(gtype)))
+    add_label(g, geom_node, "{} Geometry".format(_geo_type(gtype)))
+    add_property(g, feat_node, geom_node, plan.geometry_link)
+
+    # include WKT
+    geom_wkt_node = Literal(geom_wkt, datatype=plan.wkt_datatype)
+    add_property(g, geom_node, geom_wkt_node, plan.wkt_link)
+
+    return ntriples
 
 def _geo_type(gtype):
     if gtype == "POINT":
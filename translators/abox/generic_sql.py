@@ -1,11 +1,17 @@
 #!/usr/bin/python3
 
+from concurrent.futures import ThreadPoolExecutor
 from logging import getLogger
-from rdflib.term import URIRef, Literal
+from time import perf_counter
+from rdflib.term import URIRef
 from rdflib.graph import Graph
-from rdflib.namespace import Namespace
+from rdflib.namespace import Namespace, RDF, RDFS
 
 from rdf.operators import gen_hash, add_property, add_label, add_type
+from rdf.sinks import LineBuffer, TripleBuffer
+from translators.abox import columnar, metrics, pipeline
+from translators.abox.plan import TranslationPlan, to_literal
+from translators.references.reference_manager import ReferenceManager
 
 
 DEFAULT_NAMESPACE = "http://www.rijkswaterstaat.nl/linked_data/"
@@ -16,43 +22,67 @@ MAX_ITERATIONS = 10
 
 logger = getLogger(__name__)
 
-def translate(server, mapper, references, visited, time):
+def translate(server, mapper, references, visited, time, workers=1, sink=None, checkpoint=None, stage=None):
     """ Translate
+
+    With more than one worker, the tables of each iteration are
+    translated concurrently using pooled server sessions. Triples are
+    written into sink if one is given, and into a new graph otherwise.
+    If a checkpoint is given, progress is saved after every iteration
+    under the name stage, and a finished stage is not run again.
     """
     # selected database
     database = mapper.database_name()
-
-    # override variables
-    global DEFAULT_NAMESPACE, DEFAULT_PREFIX, DEFAULT_SCHEMA_NAMESPACE, DEFAULT_SCHEMA_PREFIX
-    DEFAULT_NAMESPACE = "http://www.rijkswaterstaat.nl/linked_data/{}/".format(database)
-    DEFAULT_PREFIX = "rws.{}".format(database)
-    DEFAULT_SCHEMA_NAMESPACE = "http://www.rijkswaterstaat.nl/linked_data/schema/{}/".format(database)
-    DEFAULT_SCHEMA_PREFIX = "rws.schema.{}".format(database)
+    _override_namespaces(database)
 
     # init graph instance
-    g = Graph(identifier=gen_hash(database.upper(), time))
+    g = Graph(identifier=gen_hash(database.upper(), time)) if sink is None else sink
 
     # update namespaces
     _update_namespaces(g.namespace_manager)
 
     i = 0
+    if checkpoint is not None:
+        checkpoint.restore_graph(g)
+        if checkpoint.done(stage):
+            logger.info("Skipping completed stage {}".format(stage))
+            return g
+
+        i = checkpoint.iterations(stage)
+
     while True:
-        for referenced_table, referenced_records in references.references(sync=True):
-            if len(referenced_records) <= 0:
-                # skip
-                continue
+        t0 = perf_counter()
+        frontier = [(referenced_table, referenced_records) for referenced_table, referenced_records
+                    in references.references(sync=True) if len(referenced_records) > 0]
+
+        # keep the triples of this iteration apart when checkpointing
+        shard = g
+        if checkpoint is not None:
+            shard = TripleBuffer()
+            _update_namespaces(shard.namespace_manager)
 
-            # translate table
-            _table_to_graph(g, server, references, referenced_table, mapper)
+        # translate tables
+        if workers > 1:
+            _frontier_to_graph(shard, server, references, frontier, mapper, workers)
+        else:
+            for referenced_table, referenced_records in frontier:
+                _table_to_graph(shard, server, references, referenced_table, referenced_records, mapper)
 
-            # update visited records
+        # update visited records
+        for referenced_table, referenced_records in frontier:
             visited.add_references(referenced_table, referenced_records)
 
         # sync
         references.difference_update(visited)
 
-
         i += 1
+        metrics.current().iteration(stage, i, {referenced_table: len(referenced_records)
+                                               for referenced_table, referenced_records in frontier},
+                                    perf_counter() - t0)
+        if checkpoint is not None:
+            checkpoint.save(stage, i, references, visited, shard)
+            shard.flush(g)
+
         if references.is_empty():
             logger.info("No more references")
             break
@@ -60,73 +90,196 @@ def translate(server, mapper, references, visited, time):
             logger.info("Maximum number of iterations reached: {}".format(i))
             break
 
+    if checkpoint is not None:
+        checkpoint.save(stage, i, references, visited, done=True)
+
     return g
 
-def _table_to_class(g, mapping):
-    ns = dict(g.namespace_manager.namespaces())
+def _frontier_to_graph(g, server, references, frontier, mapper, workers):
+    """ Translate all tables of a frontier in parallel
+
+    Each table is translated into its own triple buffer, and collects
+    its own newly found references, on a pooled connection. These are
+    merged in frontier order once all tables are done.
+    """
+    lines = columnar.enabled() and columnar.takes_lines(g)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(_table_to_partial_graph, server, table, records, mapper, lines)
+                   for table, records in frontier]
+        partials = [future.result() for future in futures]
 
-    return URIRef(ns[DEFAULT_SCHEMA_PREFIX] + mapping['classname'])
+    for partial, found in partials:
+        partial.flush(g)
+        references.union_update(found)
 
-def _table_to_graph(g, server, references, table, mapper):
+def _table_to_partial_graph(server, table, referenced_records, mapper, lines=False):
+    g = LineBuffer() if lines else TripleBuffer()
+    _update_namespaces(g.namespace_manager)
+
+    found = ReferenceManager()
+    with server.session() as session:
+        _table_to_graph(g, session, found, table, referenced_records, mapper)
+
+    return (g, found)
+
+def _table_to_plan(g, table, mapper):
     ns = dict(g.namespace_manager.namespaces())
-    logger.info("Processing table {}".format(table))
     mapping = mapper.schema['schema'][table]
 
-    # define class
-    class_node = _table_to_class(g, mapping)
+    return TranslationPlan(mapping,
+                           mapper.attributes(table),
+                           mapper.relations(table),
+                           ns[DEFAULT_PREFIX],
+                           ns[DEFAULT_SCHEMA_PREFIX])
+
+def _table_to_graph(g, server, references, table, referenced_records, mapper):
+    logger.info("Processing table {}".format(table))
+    plan = _table_to_plan(g, table, mapper)
+
+    if plan.identifier is None:
+        return
 
     # translate records
-    referenced_nodes = list(references.references(table=table))
-    attributes = list(mapper.attributes(table))
-    relations = list(mapper.relations(table))
+    referenced_nodes = referenced_records
+
+    with metrics.current().table(table) as measurement:
+        # only fetch referenced records
+        records = measurement.fetching(server.records_in(table, plan.identifier, referenced_nodes))
+        records = measurement.keeping(rec for rec in records if rec[plan.identifier] in referenced_nodes)
+
+        if columnar.enabled() and columnar.takes_lines(g):
+            measurement.triples = _records_to_lines(g, references, records, plan)
+            return
+
+        if pipeline.enabled():
+            measurement.triples = _records_to_graph_pipelined(g, references, records, plan)
+            return
+
+        for rec in records:
+            measurement.triples += _record_to_graph(g, references, rec, plan)
+
+def _records_to_graph_pipelined(g, references, records, plan):
+    """ Translate batches of records while the next are being fetched;
+        returns the number of triples
+    """
+    def translate_batch(batch):
+        buffer = TripleBuffer()
+        found = ReferenceManager()
+        for rec in batch:
+            _record_to_graph(buffer, found, rec, plan)
+
+        return (buffer, found)
+
+    ntriples = 0
+    def write(result):
+        nonlocal ntriples
+        buffer, found = result
+        ntriples += len(buffer)
+        buffer.flush(g)
+        references.union_update(found)
 
-    records = server.records(table)
-    for rec in records:
-        if mapping['identifier'] is None:
+    pipeline.run(pipeline.batched(records), translate_batch, write)
+
+    return ntriples
+
+def _records_to_lines(g, references, records, plan):
+    """ Translate records in column batches straight to N-Triples lines,
+        using the pipeline if enabled; returns the number of triples
+    """
+    ntriples = 0
+    if not pipeline.enabled():
+        for batch in columnar.batched(records):
+            lines = columnar.batch_to_lines(batch, plan, references)
+            ntriples += len(lines)
+            g.add_lines(lines)
+
+        return ntriples
+
+    def translate_batch(batch):
+        found = ReferenceManager()
+        return (columnar.batch_to_lines(batch, plan, found), found)
+
+    def write(result):
+        nonlocal ntriples
+        lines, found = result
+        ntriples += len(lines)
+        g.add_lines(lines)
+        references.union_update(found)
+
+    pipeline.run(columnar.batched(records), translate_batch, write)
+
+    return ntriples
+
+def _record_to_graph(g, references, rec, plan):
+    """ Add the triples of rec to g; returns their number
+    """
+    # node for this record
+    rec_node = URIRef(plan.namespace + gen_hash(plan.classname, rec[plan.identifier]))
+    add_type(g, rec_node, plan.class_node)
+    add_label(g, rec_node, "{} {}".format(plan.classname, rec[plan.identifier]))
+    ntriples = 2
+
+    for column, attr_link, datatype in plan.attributes:
+        v = rec.get(column)
+        if v is None:
+            continue
+
+        # create node
+        attr_node = to_literal(v, datatype)
+        if attr_node is None:
             continue
-        if rec[mapping['identifier']] not in referenced_nodes:
+
+        # link to node
+        add_property(g, rec_node, attr_node, attr_link)
+        ntriples += 1
+
+    for column, rel_link, inverse_rel_link, targetclassname, targettable in plan.relations:
+        v = rec.get(column)
+        if v is None:
             continue
 
-        # node for this record
-        rec_node = URIRef(ns[DEFAULT_PREFIX] + gen_hash(mapping['classname'], rec[mapping['identifier']]))
-        add_type(g, rec_node, class_node)
-        add_label(g, rec_node, "{} {}".format(mapping['classname'], rec[mapping['identifier']]))
-
-        for k,v in rec.items():
-            if v is None:
-                continue
-            if k in attributes:
-                # create node
-                attr = mapping['attributes'][k]
-                try:
-                    if type(v) is str:
-                        v = v.strip()
-                    attr_node = Literal(v, datatype=URIRef(attr['datatype']))
-                except UnicodeDecodeError:
-                    if type(v) is bytes:
-                        v = v.decode('utf-8', 'ignore')
-                        attr_node = Literal(v, datatype=URIRef(attr['datatype']))
-
-                # link to node
-                attr_link = URIRef(ns[DEFAULT_SCHEMA_PREFIX] + "{}_{}".format(mapping['classname'].lower(), attr['property']))
-                add_property(g, rec_node, attr_node, attr_link)
-            if k in relations:
-                rel = mapping['relations'][k]
-
-                # create node
-                referenced_node = URIRef(ns[DEFAULT_PREFIX] + gen_hash(rel['targetclassname'], v))
-
-                # link to node
-                rel_link = URIRef(ns[DEFAULT_SCHEMA_PREFIX] + "{}_{}".format(mapping['classname'].lower(), rel['property']))
-                add_property(g, rec_node, referenced_node, rel_link)
-
-                # add back link
-                inverse_rel_link = URIRef(ns[DEFAULT_SCHEMA_PREFIX] + "{}_inv_{}".format(rel['targetclassname'].lower(),
-                                                                                         mapping['classname'].lower()))
-                add_property(g, referenced_node, rec_node, inverse_rel_link)
-
-                # store referenced nodes for further processing
-                references.add_reference(rel['targettable'], v)
+        # create node
+        referenced_node = URIRef(plan.namespace + gen_hash(targetclassname, v))
+
+        # link to node and add back link
+        add_property(g, rec_node, referenced_node, rel_link)
+        add_property(g, referenced_node, rec_node, inverse_rel_link)
+        ntriples += 2
+
+        # store referenced nodes for further processing
+        references.add_reference(targettable, v)
+
+    return ntriples
+
+def secondary_tables(catalog, mapper, table):
+    """ Return the mapped tables which refer to table, each with its
+        referring columns, in dependency order
+    """
+    return [(dependent, columns) for dependent, columns in catalog.dependent_tables(table)
+            if dependent in mapper.schema['schema'].keys()]
+
+def record_terms(g, table, mapper, record_ids):
+    """ Return the nodes of the given records of table, together with
+        the predicates of the triples about these records which they add
+        themselves, and those of the back links they add
+    """
+    plan = _table_to_plan(g, table, mapper)
+    nodes = {URIRef(plan.namespace + gen_hash(plan.classname, record_id)) for record_id in record_ids}
+
+    predicates = {RDF.uri + 'type', RDFS.uri + 'label'}
+    predicates.update(attr_link for _, attr_link, _ in plan.attributes)
+    predicates.update(rel_link for _, rel_link, _, _, _ in plan.relations)
+
+    return (nodes, predicates, {inverse_rel_link for _, _, inverse_rel_link, _, _ in plan.relations})
+
+def _override_namespaces(database):
+    """ Override the default namespaces with those of database
+    """
+    global DEFAULT_NAMESPACE, DEFAULT_PREFIX, DEFAULT_SCHEMA_NAMESPACE, DEFAULT_SCHEMA_PREFIX
+    DEFAULT_NAMESPACE = "http://www.rijkswaterstaat.nl/linked_data/{}/".format(database)
+    DEFAULT_PREFIX = "rws.{}".format(database)
+    DEFAULT_SCHEMA_NAMESPACE = "http://www.rijkswaterstaat.nl/linked_data/schema/{}/".format(database)
+    DEFAULT_SCHEMA_PREFIX = "rws.schema.{}".format(database)
 
 def _update_namespaces(namespace_manager):
     """ Update Namespaces
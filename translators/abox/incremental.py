@@ -0,0 +1,112 @@
+#!/usr/bin/python3
+
+from logging import getLogger
+from json import load, dump
+from re import fullmatch
+
+from rdflib.graph import Graph
+
+from interfaces.catalog import load as load_catalog
+from translators.abox.generic_sql import record_terms
+from translators.references.reference_manager import ReferenceManager
+
+
+TIMESTAMP_COLUMN = "TimeStamp"  # rowversion
+
+logger = getLogger(__name__)
+
+def load_state(path):
+    """ Load the watermarks and visited records of an earlier run
+    """
+    logger.info("Loading translation state from {}".format(path))
+    with open(path, 'r') as f:
+        state = load(f)
+
+    visited = ReferenceManager()
+    for table, record_ids in state['visited'].items():
+        visited.add_references(table, set(record_ids))
+
+    return (state['watermarks'], visited, state['output'])
+
+def save_state(path, watermarks, visited, output):
+    logger.info("Writing translation state to {}".format(path))
+    with open(path, 'w') as f:
+        dump({'watermarks': watermarks,
+              'visited': {table: list(record_ids) for table, record_ids in visited.references()},
+              'output': output}, f)
+
+def watermarks(server, tables, catalog_path=None):
+    """ Return the highest rowversion per table, for tables that have one,
+        which are found through the catalog, optionally cached at
+        catalog_path
+    """
+    catalog = load_catalog(server, catalog_path)
+
+    marks = {}
+    for table in tables:
+        columns = [column['column_name'] for column in catalog.list_columns(table)]
+        if TIMESTAMP_COLUMN not in columns:
+            continue
+
+        q = """SELECT CONVERT(VARCHAR(18), MAX([{}]), 1) AS watermark
+               FROM {}""".format(TIMESTAMP_COLUMN, server.server.absolute(table))
+        mark = server.page(q)[0]['watermark']
+        if mark is not None:
+            marks[table] = mark
+
+    return marks
+
+def changed_references(server, mapper, marks, visited):
+    """ Return the visited records which changed since their table's
+        watermark
+    """
+    changed = ReferenceManager()
+    for table, record_ids in visited.references():
+        if table not in marks.keys():
+            continue
+        if fullmatch("0x[0-9A-Fa-f]+", marks[table]) is None:
+            raise ValueError("Invalid watermark for table {}: {}".format(table, marks[table]))
+
+        identifier = mapper.schema['schema'][table]['identifier']
+        condition = "[{}] > CONVERT(BINARY(8), '{}', 1)".format(TIMESTAMP_COLUMN, marks[table])
+        records = server.records(table, select="[{}]".format(identifier), where=condition)
+
+        ids = {rec[identifier] for rec in records if rec[identifier] in record_ids}
+        if len(ids) > 0:
+            changed.add_references(table, ids)
+
+    return changed
+
+def delta(previous, current, changed, mapper, base):
+    """ Compare a partial translation with the previous full graph
+
+    Returns the triples to add and to remove. Removal candidates are the
+    triples previously generated for the changed records: those about
+    them with a predicate their own table emits, and the back links they
+    added. Back links to them which other records added are kept, as
+    these records were not translated again. Triples about the dataset
+    node base are left to the meta data.
+    """
+    additions = Graph()
+    removals = Graph()
+
+    for triple in current:
+        if triple[0] != base and triple not in previous:
+            additions.add(triple)
+
+    for table, record_ids in changed.references():
+        nodes, predicates, inverse_links = record_terms(current, table, mapper, record_ids)
+        for node in nodes:
+            for predicate in predicates:
+                for triple in previous.triples((node, predicate, None)):
+                    if triple not in current:
+                        removals.add(triple)
+
+            for inverse_link in inverse_links:
+                for triple in previous.triples((None, inverse_link, node)):
+                    if triple not in current:
+                        removals.add(triple)
+
+    logger.info("Delta holds {} additions and {} removals".format(len(additions), len(removals)))
+
+    return (additions, removals)
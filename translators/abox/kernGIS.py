@@ -8,13 +8,13 @@ from translators.abox.generic_gdb import translate as translate_gdb
 
 logger = getLogger(__name__)
 
-def translate(gdb, mapper, area, time):
+def translate(gdb, mapper, area, time, sink=None):
     """ Translate
     """
     # determine database
     database = mapper.database_name()
 
-    g = translate_gdb(gdb, mapper, area, time)
+    g = translate_gdb(gdb, mapper, area, time, sink)
 
     # add meta data
     add_metadata(g, "rws.{}".format(database), time, database)
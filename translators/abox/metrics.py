@@ -0,0 +1,178 @@
+#!/usr/bin/python3
+
+import json
+from contextlib import contextmanager
+from logging import getLogger
+from resource import getrusage, RUSAGE_SELF
+from threading import Lock
+from time import perf_counter
+
+
+SUMMARY_SIZE = 10
+VALUE_SIZE = 8  # assumed size of non-text values
+
+logger = getLogger(__name__)
+
+def _record_size(rec):
+    return sum(len(v) if isinstance(v, (str, bytes)) else VALUE_SIZE for v in rec.values())
+
+class TableMetrics:
+    """ Table Metrics Class
+
+    Counts of a single pass over a table or layer. Fetch time is the time
+    spent waiting on records, and bytes the estimated size of their
+    values.
+    """
+
+    FIELDS = ['rows_fetched', 'rows_kept', 'triples', 'bytes', 'fetch_seconds', 'seconds']
+
+    def __init__(self, name):
+        self.name = name
+        for field in self.FIELDS:
+            setattr(self, field, 0)
+
+    def fetching(self, records, size=_record_size):
+        """ Wrap a record iterator to count and time the fetches; size
+            estimates the bytes of a record, if given
+        """
+        records = iter(records)
+        while True:
+            t0 = perf_counter()
+            try:
+                rec = next(records)
+            except StopIteration:
+                self.fetch_seconds += perf_counter() - t0
+                return
+            self.fetch_seconds += perf_counter() - t0
+
+            self.rows_fetched += 1
+            if size is not None:
+                self.bytes += size(rec)
+
+            yield rec
+
+    def keeping(self, records):
+        """ Wrap a record iterator to count the records kept
+        """
+        for rec in records:
+            self.rows_kept += 1
+            yield rec
+
+class Metrics:
+    """ Metrics Class
+
+    Collects the metrics of every table or layer, totalled over all
+    passes, and of every iteration of the reference traversal. Tables
+    may be measured from several threads at once.
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self.clear()
+
+    @contextmanager
+    def table(self, name):
+        measurement = TableMetrics(name)
+
+        t0 = perf_counter()
+        try:
+            yield measurement
+        finally:
+            measurement.seconds = perf_counter() - t0
+            self._add(measurement)
+
+    def iteration(self, stage, iteration, records, seconds):
+        with self._lock:
+            self._iterations.append({'stage': stage,
+                                     'iteration': iteration,
+                                     'tables': len(records),
+                                     'records': sum(records.values()),
+                                     'seconds': seconds,
+                                     'peak_rss': peak_rss()})
+
+    def report(self):
+        with self._lock:
+            tables = [dict(table) for table in self._tables.values()]
+            iterations = [dict(iteration) for iteration in self._iterations]
+
+        for table in tables:
+            table['translate_seconds'] = max(0.0, table['seconds'] - table['fetch_seconds'])
+        tables.sort(key=lambda table: table['seconds'], reverse=True)
+
+        return {'seconds': perf_counter() - self._start,
+                'peak_rss': peak_rss(),
+                'tables': tables,
+                'iterations': iterations}
+
+    def clear(self):
+        with self._lock:
+            self._start = perf_counter()
+            self._tables = {}
+            self._iterations = []
+
+    def _add(self, measurement):
+        with self._lock:
+            if measurement.name not in self._tables.keys():
+                self._tables[measurement.name] = {'table': measurement.name, 'passes': 0}
+                self._tables[measurement.name].update({field: 0 for field in TableMetrics.FIELDS})
+
+            totals = self._tables[measurement.name]
+            totals['passes'] += 1
+            for field in TableMetrics.FIELDS:
+                totals[field] += getattr(measurement, field)
+
+_metrics = Metrics()
+
+def current():
+    return _metrics
+
+def merge_reports(reports):
+    """ Combine the reports of separate processes into one
+    """
+    tables = {}
+    iterations = []
+    for i, report in enumerate(reports):
+        for table in report['tables']:
+            if table['table'] not in tables.keys():
+                tables[table['table']] = dict(table)
+                continue
+
+            for field, value in table.items():
+                if field != 'table':
+                    tables[table['table']][field] += value
+
+        iterations.extend(dict(iteration, shard=i) for iteration in report['iterations'])
+
+    return {'seconds': max([report['seconds'] for report in reports], default=0.0),
+            'peak_rss': sum(report['peak_rss'] for report in reports),
+            'tables': sorted(tables.values(), key=lambda table: table['seconds'], reverse=True),
+            'iterations': iterations}
+
+def write_report(report, path):
+    logger.info("Writing metrics to {}".format(path))
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=2)
+
+def summary(report, n=SUMMARY_SIZE):
+    """ Return a few lines on the tables which took most time
+    """
+    lines = ["{:<40} {:>10} {:>10} {:>12} {:>9} {:>7}".format("table", "rows", "kept", "triples",
+                                                            "time (s)", "fetch")]
+    for table in report['tables'][:n]:
+        fetch_share = table['fetch_seconds'] / table['seconds'] if table['seconds'] > 0 else 0.0
+        lines.append("{:<40} {:>10} {:>10} {:>12} {:>9.1f} {:>7.0%}".format(table['table'][:40],
+                                                                         table['rows_fetched'],
+                                                                         table['rows_kept'],
+                                                                         table['triples'],
+                                                                         table['seconds'],
+                                                                         fetch_share))
+    lines.append("{} iterations in {:.1f}s, peak memory {:.0f} MB".format(len(report['iterations']),
+                                                                       report['seconds'],
+                                                                       report['peak_rss'] / 2**20))
+
+    return "\n".join(lines)
+
+def peak_rss():
+    """ Return the peak resident set size of this process in bytes
+    """
+    return getrusage(RUSAGE_SELF).ru_maxrss * 1024  # kilobytes on Linux
@@ -0,0 +1,108 @@
+#!/usr/bin/python3
+
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from logging import getLogger
+from queue import Queue, Full
+from threading import Thread, Event
+
+
+BATCH_SIZE = 1000
+QUEUE_SIZE = 4
+POLL_INTERVAL = 0.1
+
+_workers = 0
+_batch_size = BATCH_SIZE
+_queue_size = QUEUE_SIZE
+
+logger = getLogger(__name__)
+
+def set_pipeline_options(workers=0, batch_size=BATCH_SIZE, queue_size=QUEUE_SIZE):
+    """ Overlap fetching and translating records using workers
+        translator threads per table or layer; 0 disables the pipeline
+    """
+    global _workers, _batch_size, _queue_size
+    if workers < 0 or batch_size <= 0 or queue_size <= 0:
+        raise ValueError("Invalid pipeline options")
+    logger.info("Pipeline uses {} workers (batch size {}, queue size {})".format(workers,
+                                                                              batch_size,
+                                                                              queue_size))
+
+    _workers = workers
+    _batch_size = batch_size
+    _queue_size = queue_size
+
+def enabled():
+    return _workers > 0
+
+def batched(items, batch_size=None):
+    """ Yield lists of at most batch_size items
+    """
+    if batch_size is None:
+        batch_size = _batch_size
+
+    items = iter(items)
+    batch = list(islice(items, batch_size))
+    while len(batch) > 0:
+        yield batch
+        batch = list(islice(items, batch_size))
+
+def run(batches, translate, write):
+    """ Run a fetch, translate, and write pipeline
+
+    A fetcher thread pulls batches from the batches iterator into a
+    bounded queue, from which the workers build their results with
+    translate(batch). The calling thread passes these results to write()
+    in the original batch order. Each stage waits on the next when that
+    one falls behind, which keeps at most a few queues worth of batches
+    in memory while the source and the translators are busy together.
+    """
+    fetched = Queue(maxsize=_queue_size)
+    stop = Event()
+    errors = []
+
+    def fetch():
+        try:
+            for batch in batches:
+                if not _put(fetched, batch, stop):
+                    return
+        except Exception as e:
+            errors.append(e)
+        finally:
+            _put(fetched, None, stop)
+
+    fetcher = Thread(target=fetch, name="pipeline-fetcher", daemon=True)
+    fetcher.start()
+
+    try:
+        with ThreadPoolExecutor(max_workers=_workers) as executor:
+            pending = deque()
+            while True:
+                batch = fetched.get()
+                if batch is None:
+                    break
+
+                pending.append(executor.submit(translate, batch))
+                if len(pending) >= _queue_size:
+                    write(pending.popleft().result())
+
+            while len(pending) > 0:
+                write(pending.popleft().result())
+    finally:
+        stop.set()
+        fetcher.join()
+
+    if len(errors) > 0:
+        raise errors[0]
+
+def _put(queue, item, stop):
+    # give up once the consumer stopped, rather than block forever
+    while not stop.is_set():
+        try:
+            queue.put(item, timeout=POLL_INTERVAL)
+            return True
+        except Full:
+            continue
+
+    return False
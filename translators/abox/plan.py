@@ -0,0 +1,55 @@
+#!/usr/bin/python3
+
+from rdflib.term import URIRef, Literal
+
+
+class TranslationPlan:
+    """ Translation Plan Class
+
+    Everything needed to translate the records of a single table or
+    layer which does not depend on the record itself, derived once from
+    its mapping: the class node, and per included column its predicate,
+    datatype, and, for relations, the target's namespace and classname.
+    """
+
+    def __init__(self, mapping, attributes, relations, namespace, schema_namespace, name=None):
+        classname = mapping['classname']
+
+        self.classname = classname
+        self.identifier = mapping['identifier']
+        self.namespace = str(namespace)
+        self.class_node = URIRef(schema_namespace + classname)
+        self.hash_prefix = classname if name is None else name + classname
+
+        # (column, predicate, datatype)
+        self.attributes = []
+        for column in attributes:
+            attr = mapping['attributes'][column]
+            self.attributes.append((column,
+                                    URIRef(schema_namespace + "{}_{}".format(classname.lower(), attr['property'])),
+                                    URIRef(attr['datatype'])))
+
+        # (column, predicate, inverse predicate, target classname, target table)
+        self.relations = []
+        for column in relations:
+            rel = mapping['relations'][column]
+            self.relations.append((column,
+                                   URIRef(schema_namespace + "{}_{}".format(classname.lower(), rel['property'])),
+                                   URIRef(schema_namespace + "{}_inv_{}".format(rel['targetclassname'].lower(),
+                                                                                classname.lower())),
+                                   rel['targetclassname'],
+                                   rel['targettable']))
+
+def to_literal(value, datatype):
+    """ Convert a raw value to a typed literal, or None if it cannot be
+        decoded
+    """
+    try:
+        if type(value) is str:
+            value = value.strip()
+        return Literal(value, datatype=datatype)
+    except UnicodeDecodeError:
+        if type(value) is bytes:
+            return Literal(value.decode('utf-8', 'ignore'), datatype=datatype)
+
+    return None
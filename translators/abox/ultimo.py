@@ -2,13 +2,16 @@
 
 from logging import getLogger
 
+from interfaces.catalog import load as load_catalog
 from rdf.metadata import add_metadata
-from translators.abox.generic_sql import translate as translate_generic
+from translators.abox.estimate import estimate as estimate_generic
+from translators.abox.generic_sql import translate as translate_generic, secondary_tables
 from translators.references.reference_manager import ReferenceManager
 
 
 DATABASE = "ultimo"
 PRIMARY_TABLE = "ProcessFunction"
+ROOT_KEY = "prfid"
 SECONDARY_TABLES = []
 
 DISK_BASE_PREFIX = "rws.disk"
@@ -18,36 +21,53 @@ DISK_REFERENCE_ATTR = "beheerobject_archiefcode"
 
 logger = getLogger(__name__)
 
-def translate(server, mapper, area, time):
+def translate(server, mapper, area, time, workers=1, sink=None, references=None, visited=None, checkpoint=None,
+              catalog_path=None, root_range=None, metadata=True):
     """ Translate
+
+    Provided reference managers let a run continue from earlier work:
+    records in visited are not translated again, while those in
+    references are. A checkpoint does the same for an interrupted run.
+    Secondary tables are those which refer to PRIMARY_TABLE according
+    to the catalog, optionally cached at catalog_path. A root range, as
+    returned by root_ranges(), limits the translation to one shard, in
+    which case meta data is best left out and added once for all shards.
     """
     # retrieve table list
-    tables = server.list_tables(DATABASE)
-    logger.info("Retrieved {} tables".format(len(tables)))
+    catalog = load_catalog(server, catalog_path)
+    logger.info("Retrieved {} tables".format(len(catalog.tables())))
 
     # initiate reference managers
-    references = ReferenceManager()
-    visited = ReferenceManager()
+    if references is None:
+        references = ReferenceManager()
+    if visited is None:
+        visited = ReferenceManager()
+    if checkpoint is not None and checkpoint.restore(references, visited):
+        logger.info("Resuming from checkpoint")
 
     # load disk references if provided
     #scope = _retrieve_external_references(area)
     #logger.info("Found {} root references".format(len(scope)))
 
     # select relevant subset based on scope
-    _retrieve_root_references(references, server, PRIMARY_TABLE, area)
-    logger.info("Found {} matching root objects".format(len(set(references.references(table=PRIMARY_TABLE)))))
+    if checkpoint is None or not checkpoint.started(PRIMARY_TABLE):
+        _retrieve_root_references(references, server, PRIMARY_TABLE, area, root_range)
+        logger.info("Found {} matching root objects".format(len(set(references.references(table=PRIMARY_TABLE)))))
+        references.difference_update(visited)  # remove those we already visited
 
     # start with PRIMARY_TABLE
-    g = translate_generic(server, mapper, references, visited, time)
+    g = translate_generic(server, mapper, references, visited, time, workers, sink, checkpoint, PRIMARY_TABLE)
 
     # secondary tables
-    for table in SECONDARY_TABLES:
-        _retrieve_secondary_references(g, references, server, table, visited)
-        references.difference_update(visited)  # remove those we already visited 
-        g += translate_generic(server, mapper, references, visited, time)
+    for table, columns in _secondary_tables(catalog, mapper):
+        if checkpoint is None or not checkpoint.started(table):
+            _retrieve_secondary_references(g, references, server, mapper, table, columns, visited)
+            references.difference_update(visited)  # remove those we already visited 
+        translate_generic(server, mapper, references, visited, time, workers, g, checkpoint, table)
 
     # add meta data
-    add_metadata(g, "rws.{}".format(DATABASE), time, DATABASE)
+    if metadata:
+        add_metadata(g, "rws.{}".format(DATABASE), time, DATABASE)
 
     return g
 
@@ -63,8 +83,21 @@ def _retrieve_external_references(graph):
 
     return reference_codes
 
-def _retrieve_root_references(references, server, table, area):
-    # set condition
+def estimate(server, mapper, area, catalog_path=None):
+    """ Estimate the size of translating the records within area
+    """
+    catalog = load_catalog(server, catalog_path)
+    roots = server.count(PRIMARY_TABLE, where=_root_condition(area))
+
+    return estimate_generic(server, mapper, PRIMARY_TABLE, roots, _secondary_tables(catalog, mapper))
+
+def root_ranges(server, area, n):
+    """ Split the root records within area into n ID ranges of about
+        equal size
+    """
+    return server.key_ranges(PRIMARY_TABLE, ROOT_KEY, n, where=_root_condition(area))
+
+def _root_condition(area, root_range=None):
     condition = "PrfContext = '32768'"
     condition += """ AND CAST(REPLACE(_PrfRDGeocodeX, ',','.') AS DECIMAL) >= {}
                      AND CAST(REPLACE(_PrfRDGeocodeX, ',','.') AS DECIMAL) <= {}
@@ -73,8 +106,18 @@ def _retrieve_root_references(references, server, table, area):
                                                                                            area.maximum.x,
                                                                                            area.minimum.y,
                                                                                            area.maximum.y)
-    records = server.records(table, select='prfid AS id, PrfCode AS archiefcode', where=condition)
-    references.add_references(table, {rec['id'] for rec in records})
+    if root_range is not None:
+        condition += " AND [{0}] >= {1} AND [{0}] <= {2}".format(ROOT_KEY, int(root_range[0]), int(root_range[1]))
+
+    return condition
+
+def _retrieve_root_references(references, server, table, area, root_range=None):
+    # set condition
+    condition = _root_condition(area, root_range)
+
+    # page on the root key itself, as aliases cannot be used in WHERE
+    records = server.records(table, select="[{}]".format(ROOT_KEY), where=condition, key=ROOT_KEY)
+    references.add_references(table, {rec[ROOT_KEY] for rec in records})
 
 def _retrieve_root_references2(references, server, table, scope):
     # set condition
@@ -86,9 +129,32 @@ def _retrieve_root_references2(references, server, table, scope):
     else:
         references.add_references(table, {rec['id'] for rec in records})
 
-def _retrieve_secondary_references(g, references, server, table, visited):
-    root_references = set(visited.references(table=PRIMARY_TABLE))
-    root_referer = PRIMARY_TABLE[4:] + 'id'
-
-    records = server.records(table, select='id, {}'.format(root_referer))
-    references.add_references(table, {rec['id'] for rec in records if rec[root_referer] in root_references})
+def _secondary_tables(catalog, mapper):
+    tables = secondary_tables(catalog, mapper, PRIMARY_TABLE)
+    if len(tables) <= 0 and len(SECONDARY_TABLES) > 0:
+        # no foreign keys declared; fall back on naming convention
+        logger.warning("No tables found which refer to {}".format(PRIMARY_TABLE))
+        tables = [(table, [PRIMARY_TABLE[4:] + 'id']) for table in SECONDARY_TABLES
+                  if table in mapper.schema['schema'].keys()]
+
+    # records of tables without identifier cannot be referenced
+    unidentified = [table for table, _ in tables if mapper.schema['schema'][table]['identifier'] is None]
+    if len(unidentified) > 0:
+        logger.warning("Skipping tables without identifier: {}".format(", ".join(unidentified)))
+        tables = [(table, columns) for table, columns in tables if table not in unidentified]
+
+    logger.info("Found {} secondary tables".format(len(tables)))
+    return tables
+
+def _retrieve_secondary_references(g, references, server, mapper, table, columns, visited):
+    identifier = mapper.schema['schema'][table]['identifier']
+
+    # only fetch the records which refer to a visited root
+    record_ids = set()
+    for root_referer in columns:
+        root_references = visited.references(table=PRIMARY_TABLE)
+        records = server.records_in(table, root_referer, root_references,
+                                    select="[{}] AS id".format(identifier))
+        record_ids.update(rec['id'] for rec in records)
+
+    references.add_references(table, record_ids)
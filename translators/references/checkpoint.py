@@ -0,0 +1,107 @@
+#!/usr/bin/python3
+
+import logging
+from json import load, dump
+from os import listdir, makedirs, remove, replace
+from os.path import exists, join
+
+from rdflib.graph import Graph
+from rdflib.plugins.serializers.nt import _nt_row
+
+
+class Checkpoint:
+    """ Checkpoint Class
+
+    Persists the progress of a reference traversal to a directory: the
+    references still to visit, the visited references, and a shard with
+    the triples of every completed iteration. Progress is tracked per
+    stage, such as the traversal started from a primary or secondary
+    table.
+    """
+
+    STATE_FILE = "state.json"
+
+    def __init__(self, directory, resume=False):
+        self.logger = logging.getLogger(__name__)
+        self.logger.info("Initiating Checkpoint instance at {}".format(directory))
+
+        self.directory = directory
+        self._restored = False
+        makedirs(directory, exist_ok=True)
+
+        if resume and exists(self._path(self.STATE_FILE)):
+            with open(self._path(self.STATE_FILE), 'r') as f:
+                self._state = load(f)
+            self.logger.info("Resuming from {} shards".format(len(self._state['shards'])))
+        else:
+            self.clear()
+
+    def started(self, stage):
+        return stage in self._state['stages'].keys()
+
+    def done(self, stage):
+        return self.started(stage) and self._state['stages'][stage]['done']
+
+    def iterations(self, stage):
+        return self._state['stages'][stage]['iterations'] if self.started(stage) else 0
+
+    def restore(self, references, visited):
+        """ Restore the saved reference sets, if any; returns whether
+            there was anything to restore
+        """
+        if len(self._state['stages']) <= 0:
+            return False
+
+        for table, record_ids in self._state['references'].items():
+            references.add_references(table, set(record_ids))
+        for table, record_ids in self._state['visited'].items():
+            visited.add_references(table, set(record_ids))
+
+        return True
+
+    def restore_graph(self, g):
+        """ Add the triples of all saved shards to g, once
+        """
+        if self._restored:
+            return
+
+        for shard in self._state['shards']:
+            shard_graph = Graph()
+            shard_graph.parse(self._path(shard), format='nt')
+            g += shard_graph
+
+        self._restored = True
+
+    def save(self, stage, iterations, references, visited, shard=None, done=False):
+        """ Save a consistent state after an iteration of stage
+        """
+        if shard is not None and len(shard) > 0:
+            filename = "shard_{:05d}.nt".format(len(self._state['shards']))
+            with open(self._path(filename), 'w', encoding='utf-8') as f:
+                f.writelines(_nt_row(triple) for triple in shard)
+            self._state['shards'].append(filename)
+
+        self._state['stages'][stage] = {'iterations': iterations, 'done': done}
+        self._state['references'] = self._to_dict(references)
+        self._state['visited'] = self._to_dict(visited)
+
+        # replace state in one go to stay consistent on a crash
+        with open(self._path(self.STATE_FILE + ".tmp"), 'w') as f:
+            dump(self._state, f)
+        replace(self._path(self.STATE_FILE + ".tmp"), self._path(self.STATE_FILE))
+
+    def clear(self):
+        for filename in listdir(self.directory):
+            if filename == self.STATE_FILE or filename.startswith("shard_"):
+                remove(self._path(filename))
+
+        self._state = {'stages': {},
+                       'references': {},
+                       'visited': {},
+                       'shards': []}
+
+    def _path(self, filename):
+        return join(self.directory, filename)
+
+    def _to_dict(self, reference_manager):
+        return {table: list(record_ids) for table, record_ids in reference_manager.references()}
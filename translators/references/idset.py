@@ -0,0 +1,150 @@
+#!/usr/bin/python3
+
+import numpy as np
+
+from translators.references.spill import SpilledIDSet
+
+
+INT64_MIN = -2**63
+INT64_MAX = 2**63 - 1
+MIN_PENDING = 2**16
+
+class IDSet:
+    """ ID Set Class
+
+    Set of record IDs. Integer IDs are kept in a sorted numpy array,
+    which is replaced rather than changed in place, so that snapshots
+    can share it. Single additions and small updates are buffered and
+    merged in bulk once they add up to a quarter of the set, so that each
+    ID costs amortized O(log n). Other IDs fall back to a regular set.
+    """
+
+    def __init__(self, record_ids=()):
+        self._ids = np.empty(0, dtype=np.int64)
+        self._pending = []  # single IDs
+        self._pending_arrays = []
+        self._npending = 0
+        self._other = set()
+
+        self.update(record_ids)
+
+    def add(self, record_id):
+        if _is_int64(record_id):
+            self._pending.append(record_id)
+            self._npending += 1
+            if self._npending >= self._pending_limit():
+                self._flush()
+        else:
+            self._other.add(record_id)
+
+    def update(self, record_ids):
+        if isinstance(record_ids, IDSet):
+            record_ids._flush()
+            self._update_ints(record_ids._ids)
+            self._other |= record_ids._other
+        else:
+            record_ids = list(record_ids)
+            ints = [record_id for record_id in record_ids if type(record_id) is int]
+            try:
+                ints = np.array(ints, dtype=np.int64)
+            except OverflowError:
+                ints = np.array([record_id for record_id in ints if _is_int64(record_id)], dtype=np.int64)
+            if len(ints) < len(record_ids):
+                self._other.update(record_id for record_id in record_ids if not _is_int64(record_id))
+
+            self._update_ints(ints)
+
+    def estimated_len(self):
+        """ Return the number of IDs without merging those pending, which
+            may be counted more than once
+        """
+        return len(self._ids) + self._npending + len(self._other)
+
+    def discard(self, record_id):
+        if _is_int64(record_id):
+            self._flush()
+            self._ids = self._ids[self._ids != record_id]
+        else:
+            self._other.discard(record_id)
+
+    def difference_update(self, record_ids):
+        if isinstance(record_ids, SpilledIDSet):
+            # probe the spilled set rather than loading it
+            self._flush()
+            self._ids = np.array([record_id for record_id in self._ids.tolist() if record_id not in record_ids],
+                                 dtype=np.int64)
+            self._other = {record_id for record_id in self._other if record_id not in record_ids}
+            return
+
+        if not isinstance(record_ids, IDSet):
+            record_ids = IDSet(record_ids)
+
+        record_ids._flush()
+        self._flush()
+        self._ids = np.setdiff1d(self._ids, record_ids._ids, assume_unique=True)
+        self._other -= record_ids._other
+
+    def snapshot(self):
+        """ Return a copy which shares the integer IDs with this set
+        """
+        self._flush()
+
+        snapshot = IDSet()
+        snapshot._ids = self._ids
+        snapshot._other = set(self._other)
+
+        return snapshot
+
+    def _update_ints(self, ints):
+        if len(ints) >= self._pending_limit():
+            # large enough to merge at once
+            self._flush()
+            self._ids = _union(self._ids, ints)
+        elif len(ints) > 0:
+            self._pending_arrays.append(ints)
+            self._npending += len(ints)
+            if self._npending >= self._pending_limit():
+                self._flush()
+
+    def _pending_limit(self):
+        return max(MIN_PENDING, len(self._ids) // 4)
+
+    def _flush(self):
+        if self._npending > 0:
+            pending = self._pending_arrays + [np.array(self._pending, dtype=np.int64)]
+            self._ids = _union(self._ids, np.concatenate(pending))
+            self._pending = []
+            self._pending_arrays = []
+            self._npending = 0
+
+    def __len__(self):
+        self._flush()
+        return len(self._ids) + len(self._other)
+
+    def __iter__(self):
+        self._flush()
+        for record_id in self._ids.tolist():
+            yield record_id
+        for record_id in self._other:
+            yield record_id
+
+    def __contains__(self, record_id):
+        if not _is_int64(record_id):
+            return record_id in self._other
+
+        self._flush()
+        idx = np.searchsorted(self._ids, record_id)
+        return idx < len(self._ids) and self._ids[idx] == record_id
+
+def _union(ids, other_ids):
+    ids = np.concatenate((ids, other_ids))
+    ids.sort()
+
+    # drop duplicates
+    if len(ids) > 1:
+        ids = ids[np.concatenate(([True], ids[1:] != ids[:-1]))]
+
+    return ids
+
+def _is_int64(record_id):
+    return type(record_id) is int and INT64_MIN <= record_id <= INT64_MAX
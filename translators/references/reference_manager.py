@@ -1,8 +1,24 @@
 #!/usr/bin/python3
 
 import logging
-from copy import deepcopy
 
+from translators.references.idset import IDSet
+from translators.references.spill import SpilledIDSet
+
+
+BYTES_PER_ID = 8
+SPILL_CHECK_INTERVAL = 2**16
+
+_memory_budget = None
+_spill_directory = None
+
+def set_spill_options(memory_budget=None, directory=None):
+    """ Move references to disk once those in memory exceed
+        memory_budget bytes; None keeps everything in memory
+    """
+    global _memory_budget, _spill_directory
+    _memory_budget = memory_budget
+    _spill_directory = directory
 
 class ReferenceManager:
     """ Reference Manager Class
@@ -14,19 +30,47 @@ class ReferenceManager:
         self.logger = logging.getLogger(__name__)
         self.logger.info("Initiating Reference Manager instance")
 
+        self._memory_budget = _memory_budget
+        self._spill_directory = _spill_directory
+        self._additions = 0
+
         self.clear()
 
     def add_reference(self, table, record_id):
         if table in self._references.keys():
             self._references[table].add(record_id)
         else:
-            self._references[table] = {record_id,}
+            self._references[table] = IDSet((record_id,))
+
+        self._additions += 1
+        if self._additions % SPILL_CHECK_INTERVAL == 0:
+            self.spill()
 
     def add_references(self, table, record_ids):
         if table in self._references.keys():
             self._references[table].update(record_ids)
         else:
-            self._references[table] = record_ids
+            self._references[table] = IDSet(record_ids)
+
+        self.spill()
+
+    def spill(self):
+        """ Move the largest in-memory reference sets to disk until the
+            remainder fits the memory budget
+        """
+        if self._memory_budget is None:
+            return
+
+        in_memory = [(record_ids.estimated_len(), table) for table, record_ids in self._references.items()
+                     if isinstance(record_ids, IDSet)]
+        size = sum(n for n, _ in in_memory) * BYTES_PER_ID
+        for n, table in sorted(in_memory, reverse=True):
+            if size <= self._memory_budget:
+                break
+
+            self.logger.info("Spilling {} references of {} to disk".format(n, table))
+            self._references[table] = SpilledIDSet(self._spill_directory, self._references[table])
+            size -= n * BYTES_PER_ID
 
     def rmv_reference(self, table, record_id, trim=True):
         if table in self._references.keys():
@@ -60,7 +104,9 @@ class ReferenceManager:
             self.trim()
 
     def references(self, table=None, sync=False):
-        references_dict = deepcopy(self._references) if sync else self._references
+        references_dict = {referenced_table: referenced_records.snapshot()
+                           for referenced_table, referenced_records in self._references.items()}\
+                          if sync else self._references
 
         if table is not None:
             if table not in references_dict.keys():
@@ -0,0 +1,101 @@
+#!/usr/bin/python3
+
+import sqlite3
+from os import close, remove
+from tempfile import mkstemp
+from threading import Lock
+
+
+PAGE_SIZE = 2**16
+
+class SpilledIDSet:
+    """ Spilled ID Set Class
+
+    Set of record IDs kept in a local SQLite file, offering the same
+    operations as IDSet. Each set owns its file, which is removed once
+    the set is closed or garbage collected.
+    """
+
+    def __init__(self, directory, record_ids=()):
+        self._db = None
+        self._directory = directory
+        fd, self._path = mkstemp(suffix=".sqlite", prefix="references_", dir=directory)
+        close(fd)
+
+        self._lock = Lock()
+        self._db = sqlite3.connect(self._path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode = OFF")
+        self._db.execute("PRAGMA synchronous = OFF")
+        self._db.execute("CREATE TABLE ids (id PRIMARY KEY) WITHOUT ROWID")
+
+        self.update(record_ids)
+
+    def add(self, record_id):
+        with self._lock, self._db:
+            self._db.execute("INSERT OR IGNORE INTO ids VALUES (?)", (record_id,))
+
+    def update(self, record_ids):
+        if isinstance(record_ids, SpilledIDSet):
+            self._merge("INSERT OR IGNORE INTO ids SELECT id FROM other.ids", record_ids)
+            return
+
+        with self._lock, self._db:
+            self._db.executemany("INSERT OR IGNORE INTO ids VALUES (?)",
+                                 ((record_id,) for record_id in record_ids))
+
+    def discard(self, record_id):
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM ids WHERE id = ?", (record_id,))
+
+    def difference_update(self, record_ids):
+        if isinstance(record_ids, SpilledIDSet):
+            self._merge("DELETE FROM ids WHERE id IN (SELECT id FROM other.ids)", record_ids)
+            return
+
+        with self._lock, self._db:
+            self._db.executemany("DELETE FROM ids WHERE id = ?",
+                                 ((record_id,) for record_id in record_ids))
+
+    def snapshot(self):
+        snapshot = SpilledIDSet(self._directory)
+        snapshot.update(self)
+
+        return snapshot
+
+    def close(self):
+        if self._db is None:
+            return
+
+        self._db.close()
+        self._db = None
+        remove(self._path)
+
+    def _merge(self, statement, other):
+        with self._lock:
+            self._db.execute("ATTACH DATABASE ? AS other", (other._path,))
+            with self._db:
+                self._db.execute(statement)
+            self._db.execute("DETACH DATABASE other")
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM ids").fetchone()[0]
+
+    def __iter__(self):
+        # page through the IDs to not hold the lock between yields
+        with self._lock:
+            page = self._db.execute("SELECT id FROM ids ORDER BY id LIMIT ?", (PAGE_SIZE,)).fetchall()
+        while len(page) > 0:
+            for row in page:
+                yield row[0]
+
+            with self._lock:
+                page = self._db.execute("SELECT id FROM ids WHERE id > ? ORDER BY id LIMIT ?",
+                                        (page[-1][0], PAGE_SIZE)).fetchall()
+
+    def __contains__(self, record_id):
+        with self._lock:
+            return self._db.execute("SELECT 1 FROM ids WHERE id = ?", (record_id,)).fetchone() is not None
+
+    def __del__(self):
+        self.close()